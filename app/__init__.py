@@ -1,3 +1,4 @@
+import os
 from flask import Flask
 
 
@@ -8,6 +9,81 @@ def create_app(test_config=None):
     # Set default configuration
     app.config.from_mapping(
         SECRET_KEY="dev",
+        DATABASE=os.path.join(app.root_path, "..", "data", "shop.db"),
+        # SQLite connection profile, applied to every new connection
+        DB_JOURNAL_MODE="WAL",
+        DB_SYNCHRONOUS="NORMAL",
+        DB_CACHE_SIZE=-16000,  # negative values are KiB, i.e. ~16MB
+        DB_MMAP_SIZE=128 * 1024 * 1024,
+        DB_BUSY_TIMEOUT=5000,  # milliseconds
+        DB_TEMP_STORE="MEMORY",
+        # Warm SQLite connections kept open across requests
+        DB_POOL_SIZE=5,
+        DB_POOL_HEALTH_CHECK=True,
+        DB_POOL_HEALTH_CHECK_IDLE=30,  # seconds idle before a connection is pinged
+        # Apply pending migrations the first time an outdated database is used
+        DB_AUTO_MIGRATE=True,
+        # Catalog pagination
+        ITEMS_PAGE_SIZE=24,
+        ITEMS_MAX_PAGE_SIZE=100,
+        FEATURED_ITEMS=8,
+        # Items serialized per chunk of a streamed export
+        STREAM_CHUNK_SIZE=100,
+        # Largest operation list accepted by /shop/api/basket/batch
+        BASKET_BATCH_MAX_OPERATIONS=200,
+        # Queue basket mutations and commit them in the background
+        # (see "Basket write-behind" in the README before enabling)
+        BASKET_WRITE_BEHIND=False,
+        BASKET_WRITE_BEHIND_QUEUE_SIZE=10000,
+        BASKET_WRITE_BEHIND_BATCH_SIZE=500,
+        BASKET_WRITE_BEHIND_READ_TIMEOUT=5.0,  # seconds a read waits for a flush
+        # In-process catalog cache (size 0 disables it)
+        ITEM_CACHE_SIZE=1024,
+        ITEM_CACHE_TTL=60,  # seconds
+        # Users looked up by login_required
+        USER_CACHE_SIZE=4096,
+        USER_CACHE_TTL=30,  # seconds
+        # Verified JWTs, kept until they expire (TTL is an upper bound)
+        TOKEN_CACHE_SIZE=4096,
+        TOKEN_CACHE_TTL=3600,  # seconds
+        # Rendered catalog grids of the home and items pages
+        FRAGMENT_CACHE_SIZE=256,
+        FRAGMENT_CACHE_TTL=300,  # seconds
+        # gzip/deflate response compression for text bodies
+        COMPRESSION_ENABLED=True,
+        COMPRESSION_MIN_SIZE=500,  # bytes
+        COMPRESSION_LEVEL=6,
+        COMPRESSION_MIMETYPES=(
+            "text/html",
+            "text/css",
+            "text/plain",
+            "application/json",
+            "application/javascript",
+        ),
+        # Compressed bodies of ETag-tagged (catalog API) responses
+        COMPRESSED_CACHE_SIZE=256,
+        COMPRESSED_CACHE_TTL=300,  # seconds
+        # PBKDF2 cost; stored hashes are upgraded/downgraded on login
+        PASSWORD_HASH_ITERATIONS=100000,
+        # Worker threads for PBKDF2 password hashing (0 hashes inline)
+        PASSWORD_HASH_WORKERS=4,
+        PASSWORD_HASH_MAX_PENDING=32,  # hashes allowed to wait for a worker
+        PASSWORD_HASH_QUEUE_TIMEOUT=2.0,  # seconds to wait for a slot
+        # Identify token users from the JWT alone on GET/HEAD/OPTIONS requests
+        AUTH_TRUST_JWT_CLAIMS=False,
+        # Per-request timings (SQL, JWT, hashing, auth, rendering)
+        INSTRUMENTATION_ENABLED=True,
+        SERVER_TIMING_HEADER=True,
+        # Log statements slower than this, with their query plan (None disables)
+        SLOW_QUERY_THRESHOLD_MS=100,
+        SLOW_QUERY_LOG_SIZE=200,  # distinct normalized statements kept
+        # Prometheus metrics at /ops/metrics; set a token to require
+        # "Authorization: Bearer <token>" from the scraper
+        METRICS_ENABLED=True,
+        METRICS_TOKEN=None,
+        # /ops/stats and /ops/slow-queries expose SQL text and timings; they
+        # are only served when set, to "Authorization: Bearer <token>"
+        OPS_TOKEN=None,
     )
 
     if test_config is None:
@@ -17,24 +93,76 @@ def create_app(test_config=None):
         # Load the test config if passed in
         app.config.from_mapping(test_config)
 
+    # Serialize model rows directly in JSON responses
+    from app.models import ModelJSONProvider
+
+    app.json = ModelJSONProvider(app)
+
     # Register database
     from app.db import init_app
 
     init_app(app)
 
+    # Register in-process caches
+    from app.services import cache
+
+    cache.init_app(app)
+
+    # Register catalog version counter
+    from app.services import item_service
+
+    item_service.init_app(app)
+
+    # Register password hashing pool
+    from app.services import hashing_service
+
+    hashing_service.init_app(app)
+
+    # Register basket write-behind queue (when enabled)
+    from app.services import basket_writer
+
+    basket_writer.init_app(app)
+
+    # Register request timing instrumentation
+    from app.services import instrumentation
+
+    instrumentation.init_app(app)
+
+    # Register slow query log
+    from app.services import slow_queries
+
+    slow_queries.init_app(app)
+
+    # Register Prometheus metrics
+    from app.services import metrics
+
+    metrics.init_app(app)
+
+    # Register response compression
+    from app.services import compression
+
+    compression.init_app(app)
+
     # Register db commands
-    from app.db.commands import init_db_command, generate_data_command
+    from app.db.commands import (
+        init_db_command,
+        migrate_db_command,
+        generate_data_command,
+    )
 
     app.cli.add_command(init_db_command)
+    app.cli.add_command(migrate_db_command)
     app.cli.add_command(generate_data_command)
 
     # Register blueprints
     from app.routes.main import main_bp
     from app.routes.auth import auth_bp
     from app.routes.shop import shop_bp
+    from app.routes.ops import ops_bp
 
     app.register_blueprint(main_bp)
     app.register_blueprint(auth_bp)
     app.register_blueprint(shop_bp)
+    app.register_blueprint(ops_bp)
 
     return app
@@ -1,34 +1,152 @@
 import sqlite3
 import os
+import re
+import threading
 from flask import g, current_app
+from app.db.pool import ConnectionPool
+
+# Config keys of the connection profile and the PRAGMA each one sets
+PRAGMA_SETTINGS = (
+    ('DB_JOURNAL_MODE', 'journal_mode'),
+    ('DB_SYNCHRONOUS', 'synchronous'),
+    ('DB_CACHE_SIZE', 'cache_size'),
+    ('DB_MMAP_SIZE', 'mmap_size'),
+    ('DB_BUSY_TIMEOUT', 'busy_timeout'),
+    ('DB_TEMP_STORE', 'temp_store'),
+)
+
+def get_db_profile(config):
+    """Build the PRAGMA profile applied to new connections from app config."""
+    profile = {}
+    for key, pragma in PRAGMA_SETTINGS:
+        value = config.get(key)
+        if value is None:
+            continue
+        if not re.fullmatch(r'-?\w+', str(value)):
+            raise ValueError(f"Invalid value for {key}: {value!r}")
+        profile[pragma] = value
+    return profile
+
+def _connect(db_path, profile, factory=sqlite3.Connection):
+    """Open a new SQLite connection for the pool.
+
+    Pooled connections move between threads, so the same-thread check is off.
+    """
+    db_dir = os.path.dirname(db_path)
+    if db_dir:
+        os.makedirs(db_dir, exist_ok=True)
+    conn = sqlite3.connect(
+        db_path,
+        detect_types=sqlite3.PARSE_DECLTYPES,
+        factory=factory,
+        check_same_thread=False
+    )
+    conn.row_factory = sqlite3.Row
+
+    for pragma, value in profile.items():
+        conn.execute(f'PRAGMA {pragma} = {value}')
+
+    return conn
+
+def get_pool(app=None):
+    """Return the connection pool of the given (or current) app."""
+    app = app or current_app
+    return app.extensions['db_pool']
+
+def get_pool_stats():
+    """Return connection pool counters for the current app."""
+    return get_pool().stats()
+
+# Serializes the first-use schema check of each app
+_schema_lock = threading.Lock()
+
+class SchemaOutdatedError(RuntimeError):
+    """The database predates the app's migrations and DB_AUTO_MIGRATE is off."""
+
+def _ensure_schema(db):
+    """
+    Bring a database created by an older version up to date on first use.
+    An empty database is left alone until init-db creates the tables.
+    """
+    app = current_app._get_current_object()
+    if app.extensions['db_schema_ready']:
+        return
+
+    from app.db.migrate import get_migrations, get_schema_version, migrate_db
+
+    with _schema_lock:
+        if app.extensions['db_schema_ready']:
+            return
+        has_tables = db.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'items'"
+        ).fetchone()
+        if has_tables is None:
+            return
+
+        current = get_schema_version(db)
+        latest = get_migrations()[-1][0]
+        if current < latest:
+            if not app.config['DB_AUTO_MIGRATE']:
+                raise SchemaOutdatedError(
+                    f"Database schema is at version {current}, the app needs "
+                    f"version {latest}: run `flask --app app migrate-db`"
+                )
+            migrate_db()
+        app.extensions['db_schema_ready'] = True
 
 def get_db():
     """Connect to the application's configured database."""
     if 'db' not in g:
-        db_path = os.path.join(current_app.root_path, '..', 'data', 'shop.db')
-        os.makedirs(os.path.dirname(db_path), exist_ok=True)
-        g.db = sqlite3.connect(
-            db_path,
-            detect_types=sqlite3.PARSE_DECLTYPES
-        )
-        g.db.row_factory = sqlite3.Row
+        g.db = get_pool().acquire()
+        _ensure_schema(g.db)
 
     return g.db
 
 def close_db(e=None):
-    """Close the database connection."""
+    """Return the database connection to the pool."""
     db = g.pop('db', None)
 
     if db is not None:
-        db.close()
+        # Instrumented connections log slow statements whose rows were not
+        # all fetched once the request is done with them
+        finish_statements = getattr(db, 'finish_statements', None)
+        if finish_statements is not None:
+            finish_statements()
+        get_pool().release(db)
 
 def init_db():
-    """Initialize the database with schema."""
+    """Initialize the database with schema and bring it to the latest version."""
+    from app.db.migrate import migrate_db
+
     db = get_db()
-    
+
     with current_app.open_resource('db/schema.sql') as f:
         db.executescript(f.read().decode('utf8'))
 
+    migrate_db()
+    current_app.extensions['db_schema_ready'] = True
+
 def init_app(app):
     """Register database functions with the Flask app."""
+    db_path = app.config['DATABASE']
+    profile = get_db_profile(app.config)
+    if app.config['INSTRUMENTATION_ENABLED']:
+        # Count and time every statement for the request timings
+        from app.services.instrumentation import InstrumentedConnection
+
+        def connect():
+            conn = _connect(db_path, profile, InstrumentedConnection)
+            # Looked up per connection: the log is registered after the pool
+            conn.slow_query_log = app.extensions.get('slow_query_log')
+            return conn
+    else:
+        def connect():
+            return _connect(db_path, profile)
+    app.extensions['db_pool'] = ConnectionPool(
+        connect,
+        size=app.config['DB_POOL_SIZE'],
+        health_check=app.config['DB_POOL_HEALTH_CHECK'],
+        health_check_idle=app.config['DB_POOL_HEALTH_CHECK_IDLE']
+    )
+    app.extensions['db_schema_ready'] = False
     app.teardown_appcontext(close_db)
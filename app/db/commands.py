@@ -1,7 +1,9 @@
 import click
 from flask.cli import with_appcontext
 from app.db import init_db
+from app.db.migrate import migrate_db, get_schema_version
 from app.services.item_service import generate_sample_items
+from app.services.data_generator import generate_data, DEFAULT_PASSWORD
 
 @click.command('init-db')
 @with_appcontext
@@ -10,9 +12,31 @@ def init_db_command():
     init_db()
     click.echo('Initialized the database.')
 
+@click.command('migrate-db')
+@with_appcontext
+def migrate_db_command():
+    """Apply pending schema migrations without dropping data."""
+    applied = migrate_db()
+    for filename in applied:
+        click.echo(f'Applied {filename}')
+    click.echo(f'Database schema is at version {get_schema_version()}.')
+
 @click.command('generate-data')
+@click.option('--items', default=0, help='Number of synthetic items to generate.')
+@click.option('--users', default=0, help='Number of synthetic users to generate.')
+@click.option('--baskets', default=0, help='Number of users that get a basket.')
+@click.option('--basket-size', default=3.0, help='Average number of lines per basket.')
+@click.option('--seed', type=int, default=None, help='Random seed for reproducible data.')
+@click.option('--password', default=DEFAULT_PASSWORD, help='Password of every generated user.')
+@click.option('--batch-size', default=10000, help='Rows per executemany call.')
 @with_appcontext
-def generate_data_command():
-    """Generate sample data for testing and demonstration."""
-    result = generate_sample_items()
+def generate_data_command(items, users, baskets, basket_size, seed, password, batch_size):
+    """Generate sample data, or bulk synthetic data when sizes are given."""
+    if not (items or users or baskets):
+        result = generate_sample_items()
+    else:
+        result = generate_data(
+            items=items, users=users, baskets=baskets, basket_size=basket_size,
+            seed=seed, password=password, batch_size=batch_size
+        )
     click.echo(result['message'])
@@ -0,0 +1,79 @@
+import os
+import re
+import sqlite3
+from flask import current_app
+from app.db import get_db
+
+MIGRATIONS_DIR = os.path.join('db', 'migrations')
+
+def get_schema_version(db=None):
+    """Return the schema version stored in the database."""
+    db = db or get_db()
+    return db.execute('PRAGMA user_version').fetchone()[0]
+
+def get_migrations():
+    """List the available migrations as (version, name) pairs, in order."""
+    migrations = []
+    for filename in os.listdir(os.path.join(current_app.root_path, MIGRATIONS_DIR)):
+        match = re.match(r'^(\d+)_\w+\.sql$', filename)
+        if match:
+            migrations.append((int(match.group(1)), filename))
+
+    return sorted(migrations)
+
+def _split_statements(script):
+    """Split a SQL script into complete statements (trigger bodies included)."""
+    statements = []
+    buffer = ''
+    for line in script.splitlines(keepends=True):
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            statements.append(buffer.strip())
+            buffer = ''
+
+    if buffer.strip():
+        statements.append(buffer.strip())
+
+    return statements
+
+def apply_migration(db, version, filename):
+    """Apply one migration in its own transaction.
+
+    Returns False if another process already brought the schema to this
+    version while we were waiting for the write lock.
+    """
+    with current_app.open_resource(os.path.join(MIGRATIONS_DIR, filename)) as f:
+        statements = _split_statements(f.read().decode('utf8'))
+
+    db.execute('BEGIN IMMEDIATE')
+    try:
+        if get_schema_version(db) >= version:
+            db.rollback()
+            return False
+
+        for statement in statements:
+            db.execute(statement)
+        db.execute(f'PRAGMA user_version = {int(version)}')
+        db.commit()
+    except sqlite3.Error:
+        db.rollback()
+        raise
+
+    return True
+
+def migrate_db():
+    """Apply all pending migrations in place, keeping existing data.
+
+    Returns the file names of the migrations that were applied.
+    """
+    db = get_db()
+    current = get_schema_version(db)
+    applied = []
+
+    for version, filename in get_migrations():
+        if version <= current:
+            continue
+        if apply_migration(db, version, filename):
+            applied.append(filename)
+
+    return applied
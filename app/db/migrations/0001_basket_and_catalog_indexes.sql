@@ -0,0 +1,34 @@
+-- Indexes for the basket and catalog lookups.
+--
+-- basket_items is always filtered by user_id (and user_id + item_id when
+-- adding), so give it a unique composite index. Older databases may hold
+-- several rows for the same user/item pair; merge them into the oldest row
+-- first so the unique index can be built without losing quantities.
+--
+-- users.email needs no extra index: its UNIQUE constraint already creates
+-- one that the login lookup uses.
+
+UPDATE basket_items
+SET quantity = (
+    SELECT SUM(dup.quantity)
+    FROM basket_items dup
+    WHERE dup.user_id = basket_items.user_id
+      AND dup.item_id = basket_items.item_id
+)
+WHERE id IN (
+    SELECT MIN(id) FROM basket_items
+    GROUP BY user_id, item_id
+    HAVING COUNT(*) > 1
+);
+
+DELETE FROM basket_items
+WHERE id NOT IN (
+    SELECT MIN(id) FROM basket_items
+    GROUP BY user_id, item_id
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_basket_items_user_item
+    ON basket_items (user_id, item_id);
+
+-- Serves the ORDER BY name listing and name lookups
+CREATE INDEX IF NOT EXISTS idx_items_name ON items (name);
@@ -0,0 +1,34 @@
+-- Full-text index over item name and description for search_items.
+--
+-- items_fts is an external-content FTS5 table: it stores only the index and
+-- reads the text back from items. The triggers keep it in sync with every
+-- write to items, so add_item/update_item/delete_item need no extra work.
+
+CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+    name,
+    description,
+    content='items',
+    content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS items_fts_after_insert AFTER INSERT ON items BEGIN
+    INSERT INTO items_fts (rowid, name, description)
+    VALUES (new.id, new.name, new.description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS items_fts_after_delete AFTER DELETE ON items BEGIN
+    INSERT INTO items_fts (items_fts, rowid, name, description)
+    VALUES ('delete', old.id, old.name, old.description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS items_fts_after_update
+AFTER UPDATE OF name, description ON items BEGIN
+    INSERT INTO items_fts (items_fts, rowid, name, description)
+    VALUES ('delete', old.id, old.name, old.description);
+    INSERT INTO items_fts (rowid, name, description)
+    VALUES (new.id, new.name, new.description);
+END;
+
+-- Index the items that already exist
+INSERT INTO items_fts (items_fts) VALUES ('rebuild');
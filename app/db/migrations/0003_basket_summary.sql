@@ -0,0 +1,62 @@
+-- Per-user basket summary (number of units and total price) for badges and
+-- totals, so reading them is a primary key lookup instead of a JOIN + SUM.
+--
+-- A missing row means "not computed yet"; basket_service fills it from
+-- basket_items on first read. Once a row exists, the triggers below keep it
+-- up to date incrementally on every basket write, and price changes or
+-- deleted items drop the rows of the affected users so they are recomputed.
+
+CREATE TABLE IF NOT EXISTS basket_summary (
+    user_id INTEGER PRIMARY KEY,
+    item_count INTEGER NOT NULL DEFAULT 0,
+    total REAL NOT NULL DEFAULT 0,
+    FOREIGN KEY (user_id) REFERENCES users (id)
+);
+
+-- Finds the baskets holding an item when its price changes
+CREATE INDEX IF NOT EXISTS idx_basket_items_item ON basket_items (item_id);
+
+CREATE TRIGGER IF NOT EXISTS basket_summary_after_insert
+AFTER INSERT ON basket_items BEGIN
+    UPDATE basket_summary
+    SET item_count = item_count + new.quantity,
+        total = total + new.quantity * (SELECT price FROM items WHERE id = new.item_id)
+    WHERE user_id = new.user_id
+      AND EXISTS (SELECT 1 FROM items WHERE id = new.item_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS basket_summary_after_delete
+AFTER DELETE ON basket_items BEGIN
+    UPDATE basket_summary
+    SET item_count = item_count - old.quantity,
+        total = total - old.quantity * (SELECT price FROM items WHERE id = old.item_id)
+    WHERE user_id = old.user_id
+      AND EXISTS (SELECT 1 FROM items WHERE id = old.item_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS basket_summary_after_update
+AFTER UPDATE OF user_id, item_id, quantity ON basket_items BEGIN
+    UPDATE basket_summary
+    SET item_count = item_count - old.quantity,
+        total = total - old.quantity * (SELECT price FROM items WHERE id = old.item_id)
+    WHERE user_id = old.user_id
+      AND EXISTS (SELECT 1 FROM items WHERE id = old.item_id);
+    UPDATE basket_summary
+    SET item_count = item_count + new.quantity,
+        total = total + new.quantity * (SELECT price FROM items WHERE id = new.item_id)
+    WHERE user_id = new.user_id
+      AND EXISTS (SELECT 1 FROM items WHERE id = new.item_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS basket_summary_after_price_update
+AFTER UPDATE OF price ON items
+WHEN old.price IS NOT new.price BEGIN
+    DELETE FROM basket_summary
+    WHERE user_id IN (SELECT user_id FROM basket_items WHERE item_id = new.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS basket_summary_after_item_delete
+AFTER DELETE ON items BEGIN
+    DELETE FROM basket_summary
+    WHERE user_id IN (SELECT user_id FROM basket_items WHERE item_id = old.id);
+END;
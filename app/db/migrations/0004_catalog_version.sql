@@ -0,0 +1,36 @@
+-- Catalog version for the ETag/Last-Modified of the catalog endpoints.
+--
+-- One row, bumped by triggers on every write to items, so a change made by
+-- any process (another worker, `flask generate-data`, an admin script)
+-- changes the tag every process serves. tag is random per database, so a
+-- recreated database never reuses the tags of older data.
+
+CREATE TABLE IF NOT EXISTS catalog_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    tag TEXT NOT NULL DEFAULT (lower(hex(randomblob(4)))),
+    version INTEGER NOT NULL DEFAULT 0,
+    last_modified INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
+);
+
+INSERT OR IGNORE INTO catalog_version (id) VALUES (1);
+
+CREATE TRIGGER IF NOT EXISTS catalog_version_after_insert AFTER INSERT ON items BEGIN
+    UPDATE catalog_version
+    SET version = version + 1,
+        last_modified = CAST(strftime('%s', 'now') AS INTEGER)
+    WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS catalog_version_after_update AFTER UPDATE ON items BEGIN
+    UPDATE catalog_version
+    SET version = version + 1,
+        last_modified = CAST(strftime('%s', 'now') AS INTEGER)
+    WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS catalog_version_after_delete AFTER DELETE ON items BEGIN
+    UPDATE catalog_version
+    SET version = version + 1,
+        last_modified = CAST(strftime('%s', 'now') AS INTEGER)
+    WHERE id = 1;
+END;
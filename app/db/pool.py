@@ -0,0 +1,130 @@
+import sqlite3
+import threading
+import time
+
+
+class ConnectionPool:
+    """Keep warm SQLite connections around for the worker threads.
+
+    Idle connections are kept in one shared LIFO list, so a server that
+    starts a new thread per request still reuses them. Connections must be
+    opened with ``check_same_thread=False``; each one is only used by a
+    single thread between ``acquire`` and ``release``. ``size`` caps how many
+    connections the pool keeps open in total; any connection handed out
+    beyond that limit is closed again on release. With ``health_check``,
+    connections that sat idle for at least ``health_check_idle`` seconds are
+    pinged before reuse; recently used ones are handed out as they are.
+    """
+
+    def __init__(self, connect, size=5, health_check=True, health_check_idle=30):
+        self._connect = connect
+        self.size = size
+        self.health_check = health_check
+        self.health_check_idle = health_check_idle
+        self._lock = threading.Lock()
+        self._idle = []
+        self._retained = 0
+        self._in_use = 0
+        self._open = 0
+        self._overflow = set()
+        self._stats = {
+            'created': 0,
+            'reused': 0,
+            'closed': 0,
+            'discarded': 0,
+        }
+
+    def _close(self, conn, retained=False):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._lock:
+            self._stats['closed'] += 1
+            self._open -= 1
+            if retained:
+                self._retained -= 1
+
+    def _is_healthy(self, conn):
+        try:
+            conn.execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def connect(self):
+        """Open a connection with the pool's settings that the pool does not manage."""
+        return self._connect()
+
+    def acquire(self):
+        """Check out a connection for the current thread."""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                # Most recently used first: its pages are still warm
+                conn, released = self._idle.pop()
+            if (self.health_check
+                    and time.monotonic() - released >= self.health_check_idle
+                    and not self._is_healthy(conn)):
+                self._close(conn, retained=True)
+                with self._lock:
+                    self._stats['discarded'] += 1
+                continue
+            with self._lock:
+                self._stats['reused'] += 1
+                self._in_use += 1
+            return conn
+
+        conn = self._connect()
+        with self._lock:
+            self._stats['created'] += 1
+            self._in_use += 1
+            self._open += 1
+            if self._retained < self.size:
+                self._retained += 1
+            else:
+                self._overflow.add(id(conn))
+        return conn
+
+    def release(self, conn):
+        """Return a connection to the pool, closing it if it is not retained."""
+        with self._lock:
+            self._in_use -= 1
+            overflow = id(conn) in self._overflow
+            self._overflow.discard(id(conn))
+
+        if overflow:
+            self._close(conn)
+            return
+
+        try:
+            # Never hand an open transaction to the next request.
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._close(conn, retained=True)
+            with self._lock:
+                self._stats['discarded'] += 1
+            return
+
+        with self._lock:
+            self._idle.append((conn, time.monotonic()))
+
+    def close_idle(self):
+        """Close the idle connections of the pool."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self._close(conn, retained=True)
+
+    def stats(self):
+        """Return a snapshot of the pool counters."""
+        with self._lock:
+            return dict(
+                self._stats,
+                size=self.size,
+                in_use=self._in_use,
+                open=self._open,
+                idle=len(self._idle),
+            )
@@ -1,7 +1,13 @@
+DROP TABLE IF EXISTS items_fts;
+DROP TABLE IF EXISTS basket_summary;
+DROP TABLE IF EXISTS catalog_version;
 DROP TABLE IF EXISTS users;
 DROP TABLE IF EXISTS items;
 DROP TABLE IF EXISTS basket_items;
 
+-- Baseline schema; app/db/migrations/ upgrades it from here
+PRAGMA user_version = 0;
+
 CREATE TABLE users (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
   first_name TEXT NOT NULL,
@@ -1 +1,5 @@
 # Package initialization
+from app.models.base import Model, ModelJSONProvider, execute
+from app.models.item import Item
+from app.models.user import User
+from app.models.basket import BasketLine
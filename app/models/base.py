@@ -0,0 +1,118 @@
+from flask.json.provider import DefaultJSONProvider
+
+# Row factories built by Model.row_factory_for, per (model, column names)
+_ROW_FACTORIES = {}
+
+
+class Model:
+    """Base class for compact, slotted result rows.
+
+    Subclasses list their columns in ``__slots__``. Instances are built
+    straight from SQLite result tuples by ``row_factory`` and support the
+    read-only mapping protocol (``row['name']``, ``keys()``, ``dict(row)``),
+    so code and templates written against dict rows keep working.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def row_factory(cls, cursor, row):
+        """sqlite3 row factory building an instance from a result tuple."""
+        obj = object.__new__(cls)
+        for column, value in zip(cursor.description, row):
+            setattr(obj, column[0], value)
+        return obj
+
+    @classmethod
+    def row_factory_for(cls, description):
+        """
+        Return a row factory specialized for one cursor description.
+
+        The column list is resolved once: the factory assigns every slot
+        with a single tuple unpacking instead of a setattr per column.
+        Built factories are reused for every query with the same columns.
+        """
+        names = tuple(column[0] for column in description)
+        key = (cls, names)
+        factory = _ROW_FACTORIES.get(key)
+        if factory is None:
+            if not names or not all(name in cls.__slots__ for name in names):
+                # Columns outside the slots (e.g. computed aliases) fail
+                # row by row as before
+                return cls.row_factory
+            # Only slot names reach the generated code
+            targets = ''.join(f'obj.{name}, ' for name in names)
+            namespace = {'new': object.__new__, 'cls': cls}
+            exec(
+                'def factory(cursor, row):\n'
+                '    obj = new(cls)\n'
+                f'    {targets}= row\n'
+                '    return obj\n',
+                namespace
+            )
+            factory = _ROW_FACTORIES[key] = namespace['factory']
+        return factory
+
+    def __init__(self, **fields):
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+    def keys(self):
+        """Return the names of the columns that are set."""
+        return [name for name in self.__slots__ if hasattr(self, name)]
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key) from None
+
+    def __setitem__(self, key, value):
+        try:
+            setattr(self, key, value)
+        except (AttributeError, TypeError):
+            raise KeyError(key) from None
+
+    def __contains__(self, key):
+        return key in self.__slots__ and hasattr(self, key)
+
+    def get(self, key, default=None):
+        """Return the value of a column, or default if it is not set."""
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def to_dict(self):
+        """Return the set columns as a plain dict."""
+        return {name: getattr(self, name) for name in self.keys()}
+
+    def __eq__(self, other):
+        if isinstance(other, Model):
+            return type(self) is type(other) and self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.keys())
+        return f'{type(self).__name__}({fields})'
+
+
+def execute(db, model, sql, params=()):
+    """Run a query on its own cursor whose rows are built as model instances."""
+    cursor = db.cursor()
+    cursor.execute(sql, params)
+    # Rows are converted when fetched, so the factory can follow execute
+    if cursor.description is not None:
+        cursor.row_factory = model.row_factory_for(cursor.description)
+    return cursor
+
+
+class ModelJSONProvider(DefaultJSONProvider):
+    """JSON provider that serializes Model rows as objects."""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, Model):
+            return o.to_dict()
+        return DefaultJSONProvider.default(o)
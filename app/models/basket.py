@@ -0,0 +1,8 @@
+from app.models.base import Model
+
+
+class BasketLine(Model):
+    """A basket line joined with its item's details."""
+
+    __slots__ = ('id', 'user_id', 'item_id', 'quantity', 'name', 'description',
+                 'price', 'image_url', 'subtotal')
@@ -0,0 +1,7 @@
+from app.models.base import Model
+
+
+class Item(Model):
+    """A catalog item."""
+
+    __slots__ = ('id', 'name', 'description', 'price', 'image_url', 'created_at')
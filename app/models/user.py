@@ -0,0 +1,8 @@
+from app.models.base import Model
+
+
+class User(Model):
+    """A registered user; password is only loaded for authentication."""
+
+    __slots__ = ('id', 'first_name', 'last_name', 'email', 'password',
+                 'date_of_birth', 'created_at')
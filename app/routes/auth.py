@@ -155,4 +155,8 @@ def api_login():
             }
         })
     
+    if result.get('busy'):
+        # Login burst: ask the client to back off instead of queueing more work
+        return jsonify({"message": result['message']}), 503, {'Retry-After': '1'}
+    
     return jsonify({"message": result['message']}), 401
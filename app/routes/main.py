@@ -1,6 +1,7 @@
-from flask import Blueprint, render_template, g, redirect, url_for, session
+from flask import Blueprint, render_template, g, redirect, url_for, session, current_app
 from app.services.auth_decorator import login_required
 from app.services.item_service import get_all_items
+from app.services.fragment_cache import render_catalog_fragment
 
 main_bp = Blueprint('main', __name__)
 
@@ -15,9 +16,13 @@ def index():
 @main_bp.route('/home')
 @login_required
 def home():
-    """Display the home page with items. Requires authentication."""
-    items = get_all_items()
-    return render_template('main/home.html', items=items)
+    """Display the home page with featured items. Requires authentication."""
+    limit = current_app.config['FEATURED_ITEMS']
+    item_grid = render_catalog_fragment(
+        'main/_item_grid.html', ('home', limit),
+        lambda: {'items': get_all_items(limit=limit)}
+    )
+    return render_template('main/home.html', item_grid=item_grid)
 
 @main_bp.route('/profile')
 @login_required
@@ -0,0 +1,62 @@
+import hmac
+from flask import Blueprint, Response, abort, jsonify, current_app, request
+from app.db import get_pool_stats
+from app.services.cache import get_cache_stats
+from app.services.instrumentation import get_request_stats
+from app.services.metrics import render_metrics
+from app.services.slow_queries import get_slow_query_log
+
+ops_bp = Blueprint('ops', __name__, url_prefix='/ops')
+
+def _require_token(token):
+    """Abort with 401 unless the request carries "Authorization: Bearer <token>"."""
+    expected = f'Bearer {token}'
+    if not hmac.compare_digest(request.headers.get('Authorization', ''), expected):
+        abort(401)
+
+def _require_ops_token():
+    """Guard the internal endpoints: off without OPS_TOKEN, token-only with it."""
+    token = current_app.config['OPS_TOKEN']
+    if not token:
+        abort(404)
+    _require_token(token)
+
+@ops_bp.route('/stats')
+def stats():
+    """Aggregated request timings per endpoint, with pool and cache counters."""
+    _require_ops_token()
+    requests = {}
+    if current_app.config['INSTRUMENTATION_ENABLED']:
+        requests = get_request_stats()
+
+    return jsonify({
+        'requests': requests,
+        'db_pool': get_pool_stats(),
+        'caches': get_cache_stats(),
+    })
+
+@ops_bp.route('/slow-queries')
+def slow_queries():
+    """Statements over the slow query threshold, with their plans, slowest total first."""
+    _require_ops_token()
+    log = get_slow_query_log()
+    if log is None:
+        abort(404)
+
+    return jsonify({
+        'threshold_ms': log.threshold * 1000,
+        'dropped': log.dropped,
+        'queries': log.snapshot(),
+    })
+
+@ops_bp.route('/metrics')
+def metrics():
+    """Metrics in the Prometheus text format, for scrapers rather than users."""
+    if not current_app.config['METRICS_ENABLED']:
+        abort(404)
+
+    token = current_app.config['METRICS_TOKEN']
+    if token:
+        _require_token(token)
+
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
@@ -1,19 +1,131 @@
-from flask import Blueprint, render_template, request, redirect, url_for, g, flash, jsonify, session
-from app.services.item_service import get_all_items, get_item_by_id, search_items
+from functools import wraps
+from flask import (
+    Blueprint, render_template, request, redirect, url_for, g, flash, jsonify, session,
+    current_app, Response, make_response, stream_with_context
+)
+from app.services.item_service import (
+    get_all_items, get_items_page, get_item_by_id, search_items,
+    iter_items, iter_search_items, get_catalog_version
+)
 from app.services.basket_service import (
-    get_basket_items, add_to_basket, remove_from_basket, 
-    update_basket_quantity, get_basket_total
+    get_basket_snapshot, add_to_basket, remove_from_basket, 
+    update_basket_quantity, apply_basket_operations, get_basket_summary
 )
 from app.services.auth_decorator import login_required
+from app.services.fragment_cache import render_catalog_fragment
 
 shop_bp = Blueprint('shop', __name__, url_prefix='/shop')
 
+@shop_bp.app_context_processor
+def inject_basket_summary():
+    """Make the basket badge (units and total) available to every page."""
+    user = g.get('user')
+    if user is None:
+        return {}
+    return {'basket_summary': get_basket_summary(user['id'])}
+
+def catalog_conditional(f):
+    """
+    Tag catalog responses with the catalog version as ETag/Last-Modified.
+    A request whose If-None-Match holds the current tag gets a 304 without
+    running the view, so nothing is queried or serialized.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        # Read the version first: a write racing the view can only make the
+        # tag older than the data, which costs a refetch, never stale data
+        etag, last_modified = get_catalog_version()
+        # Weak comparison: compressed responses carry the tag as W/"..."
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+        else:
+            response = make_response(f(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        
+        response.set_etag(etag)
+        response.last_modified = last_modified
+        return response
+    
+    return decorated_function
+
+def _page_size():
+    """Read the requested page size from the query string, within bounds."""
+    limit = request.args.get('limit', current_app.config['ITEMS_PAGE_SIZE'], type=int)
+    return max(1, min(limit, current_app.config['ITEMS_MAX_PAGE_SIZE']))
+
+def _page_offset():
+    """Read the requested offset from the query string."""
+    return max(request.args.get('offset', 0, type=int), 0)
+
+def _streaming_format():
+    """Return 'json' or 'ndjson' if the client asked for a streamed export."""
+    if request.args.get('format') == 'ndjson':
+        return 'ndjson'
+    if request.args.get('stream') in ('1', 'true'):
+        return 'json'
+    return None
+
+def _stream_items(items, fmt, **fields):
+    """
+    Stream items as NDJSON lines or as one JSON document, chunk by chunk.
+    Memory stays flat however many items the iterator yields.
+    """
+    dumps = current_app.json.dumps
+    chunk_size = current_app.config['STREAM_CHUNK_SIZE']
+
+    def generate():
+        chunk = []
+        if fmt == 'json':
+            # Extra top-level fields first, then the open items array
+            head = dumps(fields)[:-1]
+            yield head + (',' if fields else '') + '"items":['
+        for index, item in enumerate(items):
+            if fmt == 'ndjson':
+                chunk.append(dumps(item) + '\n')
+            else:
+                chunk.append((',' if index else '') + dumps(item))
+            if len(chunk) >= chunk_size:
+                yield ''.join(chunk)
+                chunk = []
+        if fmt == 'json':
+            chunk.append(']}')
+        if chunk:
+            yield ''.join(chunk)
+
+    mimetype = 'application/x-ndjson' if fmt == 'ndjson' else 'application/json'
+    return Response(stream_with_context(generate()), mimetype=mimetype)
+
+def _search_page(query, limit, offset):
+    """Get one page of search results and the offset of the next page."""
+    items = search_items(query, limit + 1, offset)
+    next_offset = offset + limit if len(items) > limit else None
+    return items[:limit], next_offset
+
 @shop_bp.route('/items')
 @login_required
 def items():
-    """Display all items in the shop. Requires authentication."""
-    items = get_all_items()
-    return render_template('shop/items.html', items=items)
+    """Display one page of shop items. Requires authentication."""
+    cursor = request.args.get('cursor')
+    limit = _page_size()
+
+    def load():
+        page = get_items_page(limit, cursor)
+        next_url = None
+        if page['next_cursor']:
+            next_url = url_for('shop.items', cursor=page['next_cursor'])
+        first_url = url_for('shop.items') if cursor else None
+        return {'items': page['items'], 'next_url': next_url, 'first_url': first_url}
+
+    try:
+        item_list = render_catalog_fragment(
+            'shop/_item_list.html', ('items', limit, cursor), load
+        )
+    except ValueError:
+        flash('Invalid page.')
+        return redirect(url_for('shop.items'))
+
+    return render_template('shop/items.html', item_list=item_list)
 
 @shop_bp.route('/items/<int:item_id>')
 @login_required
@@ -31,21 +143,32 @@ def item_detail(item_id):
 def search():
     """Search for items by name. Requires authentication."""
     query = request.args.get('query', '')
-    if query:
-        items = search_items(query)
-    else:
-        items = get_all_items()
-    
-    return render_template('shop/items.html', items=items, query=query)
+    if not query:
+        return redirect(url_for('shop.items'))
+
+    offset = _page_offset()
+    limit = _page_size()
+
+    def load():
+        items, next_offset = _search_page(query, limit, offset)
+        next_url = None
+        if next_offset is not None:
+            next_url = url_for('shop.search', query=query, offset=next_offset)
+        first_url = url_for('shop.search', query=query) if offset else None
+        return {'items': items, 'query': query, 'next_url': next_url, 'first_url': first_url}
+
+    item_list = render_catalog_fragment(
+        'shop/_item_list.html', ('search', query, limit, offset), load
+    )
+    return render_template('shop/items.html', item_list=item_list, query=query)
 
 @shop_bp.route('/basket')
 @login_required
 def basket():
     """Display the user's basket."""
-    basket_items = get_basket_items(g.user['id'])
-    total = get_basket_total(g.user['id'])
+    snapshot = get_basket_snapshot(g.user['id'])
     
-    return render_template('shop/basket.html', basket_items=basket_items, total=total)
+    return render_template('shop/basket.html', **snapshot)
 
 @shop_bp.route('/basket/add/<int:item_id>', methods=['POST'])
 @login_required
@@ -100,14 +223,37 @@ def remove_item_from_basket(basket_item_id):
 
 # API routes
 @shop_bp.route('/api/items')
-@login_required
+@login_required(trust_claims=True)
+@catalog_conditional
 def api_items():
-    """API endpoint to get all items. Requires authentication."""
-    items = get_all_items()
-    return jsonify({'items': items})
+    """API endpoint to get one page of items. Requires authentication.
+
+    Pages are selected with ?cursor=<next_cursor> (keyset) or ?offset=N,
+    and sized with ?limit=N up to ITEMS_MAX_PAGE_SIZE. ?stream=1 (JSON) or
+    ?format=ndjson streams the whole catalog instead.
+    """
+    fmt = _streaming_format()
+    if fmt:
+        return _stream_items(iter_items(), fmt)
+
+    limit = _page_size()
+
+    if 'offset' in request.args:
+        offset = _page_offset()
+        items = get_all_items(limit + 1, offset)
+        next_offset = offset + limit if len(items) > limit else None
+        return jsonify({'items': items[:limit], 'next_offset': next_offset})
+
+    try:
+        page = get_items_page(limit, request.args.get('cursor'))
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+
+    return jsonify(page)
 
 @shop_bp.route('/api/items/<int:item_id>')
-@login_required
+@login_required(trust_claims=True)
+@catalog_conditional
 def api_item_detail(item_id):
     """API endpoint to get a specific item. Requires authentication."""
     item = get_item_by_id(item_id)
@@ -117,25 +263,57 @@ def api_item_detail(item_id):
     return jsonify({'item': item})
 
 @shop_bp.route('/api/search')
-@login_required
+@login_required(trust_claims=True)
+@catalog_conditional
 def api_search():
-    """API endpoint to search for items. Requires authentication."""
+    """API endpoint to search for items. Requires authentication.
+
+    Results are paged with ?offset=N and ?limit=N; without a query the first
+    page of the full listing is returned. ?stream=1 or ?format=ndjson
+    streams every result instead.
+    """
     query = request.args.get('query', '')
-    if query:
-        items = search_items(query)
-    else:
-        items = get_all_items()
+    fmt = _streaming_format()
+    if fmt:
+        results = iter_search_items(query) if query else iter_items()
+        return _stream_items(results, fmt, query=query)
+
+    if not query:
+        page = get_items_page(_page_size())
+        return jsonify({'items': page['items'], 'query': query,
+                        'next_cursor': page['next_cursor']})
+
+    items, next_offset = _search_page(query, _page_size(), _page_offset())
     
-    return jsonify({'items': items, 'query': query})
+    return jsonify({'items': items, 'query': query, 'next_offset': next_offset})
 
 @shop_bp.route('/api/basket', methods=['GET'])
-@login_required
+@login_required(trust_claims=True)
 def api_basket():
     """API endpoint to get the user's basket."""
-    basket_items = get_basket_items(g.user['id'])
-    total = get_basket_total(g.user['id'])
+    return jsonify(get_basket_snapshot(g.user['id']))
+
+
+@shop_bp.route('/api/basket/summary', methods=['GET'])
+@login_required(trust_claims=True)
+def api_basket_summary():
+    """API endpoint to get the number of units and total of the user's basket."""
+    return jsonify(get_basket_summary(g.user['id']))
+
+@shop_bp.route('/api/basket/batch', methods=['POST'])
+@login_required
+def api_basket_batch():
+    """API endpoint to apply many basket operations in one transaction."""
+    operations = request.get_json(silent=True)
+    if isinstance(operations, dict):
+        operations = operations.get('operations')
+    
+    if not isinstance(operations, list):
+        return jsonify({'message': 'Expected a JSON list of operations'}), 400
+    
+    max_operations = current_app.config['BASKET_BATCH_MAX_OPERATIONS']
+    if len(operations) > max_operations:
+        return jsonify({'message': f'At most {max_operations} operations per request'}), 400
     
-    return jsonify({
-        'basket_items': basket_items,
-        'total': total
-    })
+    result = apply_basket_operations(g.user['id'], operations)
+    return jsonify(result)
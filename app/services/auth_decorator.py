@@ -1,50 +1,88 @@
 from functools import wraps
-from flask import request, jsonify, g, redirect, url_for, session
+from flask import request, jsonify, g, redirect, url_for, session, current_app
+from app.services.instrumentation import timed
 from app.services.token_service import decode_token
-from app.services.user_service import get_user_by_id
+from app.services.user_service import get_cached_user
 
-def login_required(f):
+# Requests that cannot change state, for which JWT claims may be trusted
+READ_ONLY_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+def _authenticate(trust_claims=False):
+    """
+    Identify the user of the request and set g.user.
+    Returns None on success, or the response refusing the request.
+    """
+    # Check if user is logged in via session
+    if session.get('user_id'):
+        user_id = session.get('user_id')
+        user = get_cached_user(user_id)
+        
+        if not user:
+            # User ID in session is invalid
+            session.clear()
+            return redirect(url_for('auth.login'))
+        
+        g.user = user
+        return None
+    
+    # If API request with token in header
+    if request.headers.get('Authorization'):
+        auth_header = request.headers.get('Authorization')
+        token = auth_header.split(" ")[1] if len(auth_header.split(" ")) > 1 else auth_header
+        
+        result = decode_token(token)
+        
+        if not result['success']:
+            # For API requests, return JSON error
+            return jsonify({'message': result['message']}), 401
+        
+        try:
+            user_id = int(result['user_id'])
+        except ValueError:
+            return jsonify({'message': 'Invalid token. Please log in again.'}), 401
+        
+        # A verified token is enough to identify the user on read-only
+        # views that only need the id when configured, which skips the
+        # users lookup
+        if (trust_claims and current_app.config['AUTH_TRUST_JWT_CLAIMS']
+                and request.method in READ_ONLY_METHODS):
+            g.user = {'id': user_id}
+            return None
+        
+        # Get the user and attach to flask.g for the view
+        user = get_cached_user(user_id)
+        
+        if not user:
+            return jsonify({'message': 'User not found'}), 401
+        
+        g.user = user
+        return None
+    
+    # No session or token, redirect to login
+    if request.headers.get('Accept') == 'application/json':
+        # For API requests, return JSON error
+        return jsonify({'message': 'Authentication required'}), 401
+    else:
+        # For browser requests, redirect to login
+        return redirect(url_for('auth.login'))
+
+def login_required(f=None, trust_claims=False):
+    """
+    Require an authenticated user for the view.
+    Views that only use g.user['id'] can opt in with
+    @login_required(trust_claims=True) to be served from the JWT claims
+    alone when AUTH_TRUST_JWT_CLAIMS is set.
+    """
+    if f is None:
+        return lambda view: login_required(view, trust_claims=trust_claims)
+    
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        # Check if user is logged in via session
-        if session.get('user_id'):
-            user_id = session.get('user_id')
-            user = get_user_by_id(user_id)
-            
-            if not user:
-                # User ID in session is invalid
-                session.clear()
-                return redirect(url_for('auth.login'))
-            
-            g.user = user
-            return f(*args, **kwargs)
-        
-        # If API request with token in header
-        if request.headers.get('Authorization'):
-            auth_header = request.headers.get('Authorization')
-            token = auth_header.split(" ")[1] if len(auth_header.split(" ")) > 1 else auth_header
-            
-            result = decode_token(token)
-            
-            if not result['success']:
-                # For API requests, return JSON error
-                return jsonify({'message': result['message']}), 401
-            
-            # Get the user and attach to flask.g for the view
-            user = get_user_by_id(result['user_id'])
-            
-            if not user:
-                return jsonify({'message': 'User not found'}), 401
-            
-            g.user = user
-            return f(*args, **kwargs)
-        
-        # No session or token, redirect to login
-        if request.headers.get('Accept') == 'application/json':
-            # For API requests, return JSON error
-            return jsonify({'message': 'Authentication required'}), 401
-        else:
-            # For browser requests, redirect to login
-            return redirect(url_for('auth.login'))
+        with timed('auth'):
+            denied = _authenticate(trust_claims)
+        if denied is not None:
+            return denied
+        
+        return f(*args, **kwargs)
     
     return decorated_function
@@ -1,63 +1,248 @@
 import sqlite3
+from itertools import groupby
 from app.db import get_db
+from app.models import BasketLine, execute
+from app.services.basket_writer import get_basket_writer
+
+BASKET_OPERATIONS = ('add', 'update', 'remove')
+
+# Largest quantity a single batch operation may add or set
+MAX_BATCH_QUANTITY = 10000
+
+# Range of SQLite INTEGER values; larger Python ints cannot be bound at all
+SQLITE_MAX_INTEGER = 2 ** 63 - 1
+
+# Statements used by apply_basket_operations, one executemany per run of
+# consecutive operations of the same kind
+_BATCH_STATEMENTS = {
+    'add': (
+        'INSERT INTO basket_items (user_id, item_id, quantity) VALUES (?, ?, ?) '
+        'ON CONFLICT (user_id, item_id) '
+        'DO UPDATE SET quantity = basket_items.quantity + excluded.quantity'
+    ),
+    'set': (
+        'INSERT INTO basket_items (user_id, item_id, quantity) VALUES (?, ?, ?) '
+        'ON CONFLICT (user_id, item_id) DO UPDATE SET quantity = excluded.quantity'
+    ),
+    'remove': 'DELETE FROM basket_items WHERE user_id = ? AND item_id = ?',
+}
+
+_BASKET_LINES_QUERY = '''
+    SELECT b.id, b.user_id, b.item_id, b.quantity, 
+           i.name, i.description, i.price, i.image_url
+    FROM basket_items b
+    JOIN items i ON b.item_id = i.id
+    WHERE b.user_id = ?
+    ORDER BY b.id
+'''
+
+# Units and total of one user's basket, computed from basket_items
+_SUMMARY_QUERY = '''
+    SELECT ? AS user_id, COALESCE(SUM(b.quantity), 0) AS item_count,
+           COALESCE(SUM(i.price * b.quantity), 0) AS total
+    FROM basket_items b
+    JOIN items i ON b.item_id = i.id
+    WHERE b.user_id = ?
+'''
+
+def _sync_user(user_id):
+    """Wait for a user's queued write-behind mutations before reading or writing."""
+    writer = get_basket_writer()
+    if writer is not None:
+        writer.wait_for_user(user_id)
+
+def _write_behind(user_id, kind, params):
+    """
+    Queue a basket mutation when write-behind is enabled.
+    Returns False if the caller has to write synchronously (disabled or
+    queue full); in that case the user's queued mutations are flushed first
+    so they still apply in order.
+    """
+    writer = get_basket_writer()
+    if writer is None:
+        return False
+    if writer.submit(user_id, kind, params):
+        return True
+    writer.wait_for_user(user_id)
+    return False
+
+def _line_owner(basket_item_id):
+    """Get the user a basket line belongs to (only needed for write-behind)."""
+    if get_basket_writer() is None:
+        return None
+    row = get_db().execute(
+        'SELECT user_id FROM basket_items WHERE id = ?', (basket_item_id,)
+    ).fetchone()
+    return None if row is None else row['user_id']
 
 def get_basket_items(user_id):
     """Get all items in a user's basket with item details."""
+    _sync_user(user_id)
     db = get_db()
-    basket_items = db.execute(
-        '''
-        SELECT b.id, b.user_id, b.item_id, b.quantity, 
-               i.name, i.description, i.price, i.image_url
-        FROM basket_items b
-        JOIN items i ON b.item_id = i.id
-        WHERE b.user_id = ?
-        ORDER BY b.id
-        ''',
-        (user_id,)
-    ).fetchall()
+    return execute(db, BasketLine, _BASKET_LINES_QUERY, (user_id,)).fetchall()
+
+def get_basket_snapshot(user_id):
+    """
+    Get a user's basket lines with per-line subtotals and the grand total.
+    Runs the basket query once instead of once for the lines and again for
+    the total.
+    """
+    _sync_user(user_id)
+    db = get_db()
+    basket_items = []
+    total = 0.0
     
-    return [dict(item) for item in basket_items]
+    for item in execute(db, BasketLine, _BASKET_LINES_QUERY, (user_id,)):
+        item.subtotal = item.price * item.quantity
+        total += item.subtotal
+        basket_items.append(item)
+    
+    return {'basket_items': basket_items, 'total': total}
 
 def add_to_basket(user_id, item_id, quantity=1):
-    """Add an item to the user's basket."""
+    """Add an item to the user's basket, or increase its quantity."""
     db = get_db()
     
     try:
-        # Check if item exists
-        item = db.execute('SELECT id FROM items WHERE id = ?', (item_id,)).fetchone()
-        if item is None:
-            return {'success': False, 'message': 'Item not found'}
+        if get_basket_writer() is not None:
+            if db.execute('SELECT 1 FROM items WHERE id = ?', (item_id,)).fetchone() is None:
+                return {'success': False, 'message': 'Item not found'}
+            if _write_behind(user_id, 'add', (user_id, item_id, quantity)):
+                return {'success': True, 'message': 'Item added to basket'}
         
-        # Check if item is already in basket
-        existing = db.execute(
-            'SELECT id, quantity FROM basket_items WHERE user_id = ? AND item_id = ?',
-            (user_id, item_id)
-        ).fetchone()
+        # One statement: the SELECT only yields a row if the item exists, and
+        # the unique (user_id, item_id) index turns a repeat add into an
+        # atomic quantity increment instead of a read-modify-write.
+        cursor = db.execute(
+            '''
+            INSERT INTO basket_items (user_id, item_id, quantity)
+            SELECT ?, id, ? FROM items WHERE id = ?
+            ON CONFLICT (user_id, item_id)
+            DO UPDATE SET quantity = basket_items.quantity + excluded.quantity
+            ''',
+            (user_id, quantity, item_id)
+        )
         
-        if existing:
-            # Update quantity if already in basket
-            new_quantity = existing['quantity'] + quantity
-            db.execute(
-                'UPDATE basket_items SET quantity = ? WHERE id = ?',
-                (new_quantity, existing['id'])
-            )
-        else:
-            # Add new basket item
-            db.execute(
-                'INSERT INTO basket_items (user_id, item_id, quantity) VALUES (?, ?, ?)',
-                (user_id, item_id, quantity)
-            )
+        if cursor.rowcount == 0:
+            db.rollback()
+            return {'success': False, 'message': 'Item not found'}
         
         db.commit()
         return {'success': True, 'message': 'Item added to basket'}
     except sqlite3.Error as e:
         return {'success': False, 'message': f"Database error: {e}"}
 
+def _validate_operation(operation):
+    """Check one batch operation; returns (kind, item_id, quantity) or an error message."""
+    if not isinstance(operation, dict):
+        return 'Operation must be an object'
+    
+    op = operation.get('op')
+    item_id = operation.get('item_id')
+    quantity = operation.get('quantity', 1)
+    
+    if op not in BASKET_OPERATIONS:
+        return f"Unknown operation: {op!r}"
+    if not isinstance(item_id, int) or isinstance(item_id, bool):
+        return 'item_id must be an integer'
+    if not -SQLITE_MAX_INTEGER - 1 <= item_id <= SQLITE_MAX_INTEGER:
+        return 'item_id is out of range'
+    if op == 'remove':
+        return ('remove', item_id, None)
+    if not isinstance(quantity, int) or isinstance(quantity, bool):
+        return 'quantity must be an integer'
+    if quantity > MAX_BATCH_QUANTITY:
+        return f'quantity must be at most {MAX_BATCH_QUANTITY}'
+    if op == 'add':
+        if quantity <= 0:
+            return 'quantity must be positive'
+        return ('add', item_id, quantity)
+    
+    # Updating to 0 or less removes the line, like update_basket_quantity
+    if quantity <= 0:
+        return ('remove', item_id, None)
+    return ('set', item_id, quantity)
+
+def apply_basket_operations(user_id, operations):
+    """
+    Apply a list of basket operations in a single transaction.
+    Each operation is {'op': 'add' | 'update' | 'remove', 'item_id': ..., 'quantity': ...}:
+    add increases the quantity, update sets it (0 or less removes the line)
+    and remove deletes the line. Operations are applied in order and the
+    result holds one entry per operation.
+    """
+    _sync_user(user_id)
+    results = [None] * len(operations)
+    planned = []
+    
+    for index, operation in enumerate(operations):
+        checked = _validate_operation(operation)
+        if isinstance(checked, str):
+            results[index] = {'index': index, 'success': False, 'message': checked}
+        else:
+            planned.append((index, *checked))
+    
+    db = get_db()
+    
+    try:
+        # Look up every referenced item once instead of per line
+        wanted = sorted({item_id for _, kind, item_id, _ in planned if kind != 'remove'})
+        existing = set()
+        if wanted:
+            placeholders = ', '.join('?' * len(wanted))
+            existing = {
+                row['id'] for row in db.execute(
+                    f'SELECT id FROM items WHERE id IN ({placeholders})', wanted
+                )
+            }
+        
+        valid = []
+        for index, kind, item_id, quantity in planned:
+            if kind != 'remove' and item_id not in existing:
+                results[index] = {'index': index, 'success': False, 'message': 'Item not found'}
+            else:
+                valid.append((index, kind, item_id, quantity))
+        
+        for kind, group in groupby(valid, key=lambda planned_op: planned_op[1]):
+            group = list(group)
+            if kind == 'remove':
+                params = [(user_id, item_id) for _, _, item_id, _ in group]
+            else:
+                params = [(user_id, item_id, quantity) for _, _, item_id, quantity in group]
+            db.executemany(_BATCH_STATEMENTS[kind], params)
+        
+        db.commit()
+    except sqlite3.Error as e:
+        db.rollback()
+        message = f"Database error: {e}"
+        for index, _, _, _ in planned:
+            results[index] = {'index': index, 'success': False, 'message': message}
+        return {'success': False, 'message': message, 'results': results}
+    
+    for index, _, _, _ in valid:
+        results[index] = {'index': index, 'success': True, 'message': 'Basket updated'}
+    
+    applied = len(valid)
+    return {
+        'success': applied == len(operations),
+        'message': f'Applied {applied} of {len(operations)} operations',
+        'results': results,
+    }
+
 def update_basket_quantity(basket_item_id, quantity):
     """Update the quantity of an item in the basket."""
     db = get_db()
     
     try:
+        owner = _line_owner(basket_item_id)
+        if owner is not None:
+            if quantity <= 0:
+                queued = _write_behind(owner, 'remove_line', (basket_item_id,))
+            else:
+                queued = _write_behind(owner, 'set_line', (quantity, basket_item_id))
+            if queued:
+                return {'success': True, 'message': 'Basket updated'}
+        
         if quantity <= 0:
             # Remove item if quantity is 0 or negative
             db.execute('DELETE FROM basket_items WHERE id = ?', (basket_item_id,))
@@ -78,6 +263,10 @@ def remove_from_basket(basket_item_id):
     db = get_db()
     
     try:
+        owner = _line_owner(basket_item_id)
+        if owner is not None and _write_behind(owner, 'remove_line', (basket_item_id,)):
+            return {'success': True, 'message': 'Item removed from basket'}
+        
         db.execute('DELETE FROM basket_items WHERE id = ?', (basket_item_id,))
         db.commit()
         return {'success': True, 'message': 'Item removed from basket'}
@@ -89,24 +278,57 @@ def clear_basket(user_id):
     db = get_db()
     
     try:
+        if _write_behind(user_id, 'clear', (user_id,)):
+            return {'success': True, 'message': 'Basket cleared'}
+        
         db.execute('DELETE FROM basket_items WHERE user_id = ?', (user_id,))
         db.commit()
         return {'success': True, 'message': 'Basket cleared'}
     except sqlite3.Error as e:
         return {'success': False, 'message': f"Database error: {e}"}
 
-def get_basket_total(user_id):
-    """Calculate the total cost of all items in the basket."""
+def get_basket_summary(user_id):
+    """
+    Get the number of units and the total cost of a user's basket.
+    Reads the basket_summary row maintained by triggers on basket_items;
+    the row is computed from the basket the first time it is needed.
+    """
+    _sync_user(user_id)
     db = get_db()
     
-    total = db.execute(
-        '''
-        SELECT SUM(i.price * b.quantity) as total
-        FROM basket_items b
-        JOIN items i ON b.item_id = i.id
-        WHERE b.user_id = ?
-        ''',
+    summary = db.execute(
+        'SELECT item_count, total FROM basket_summary WHERE user_id = ?',
         (user_id,)
     ).fetchone()
     
-    return total['total'] if total['total'] else 0.0
+    if summary is None:
+        # Only store the row when that commits nothing but this insert; a
+        # caller's open transaction is left alone and just gets the result
+        if not db.in_transaction:
+            try:
+                # Computing and storing in one statement keeps it consistent
+                # with concurrent basket writes
+                db.execute(
+                    f'INSERT INTO basket_summary (user_id, item_count, total) '
+                    f'{_SUMMARY_QUERY} ON CONFLICT (user_id) DO NOTHING',
+                    (user_id, user_id)
+                )
+                db.commit()
+            except sqlite3.Error:
+                # A locked database must not fail the page; compute it below
+                db.rollback()
+            summary = db.execute(
+                'SELECT item_count, total FROM basket_summary WHERE user_id = ?',
+                (user_id,)
+            ).fetchone()
+        if summary is None:
+            summary = db.execute(_SUMMARY_QUERY, (user_id, user_id)).fetchone()
+    
+    # Incremental updates accumulate float error: report cents, and exactly
+    # 0 for an emptied basket
+    total = round(summary['total'], 2) if summary['item_count'] else 0.0
+    return {'item_count': summary['item_count'], 'total': total}
+
+def get_basket_total(user_id):
+    """Calculate the total cost of all items in the basket."""
+    return get_basket_summary(user_id)['total']
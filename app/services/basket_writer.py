@@ -0,0 +1,192 @@
+import atexit
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from itertools import groupby
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+# Statement per queued mutation kind
+STATEMENTS = {
+    'add': (
+        'INSERT INTO basket_items (user_id, item_id, quantity) VALUES (?, ?, ?) '
+        'ON CONFLICT (user_id, item_id) '
+        'DO UPDATE SET quantity = basket_items.quantity + excluded.quantity'
+    ),
+    'set_line': 'UPDATE basket_items SET quantity = ? WHERE id = ?',
+    'remove_line': 'DELETE FROM basket_items WHERE id = ?',
+    'clear': 'DELETE FROM basket_items WHERE user_id = ?',
+}
+
+# Attempts per batch before it is dropped
+MAX_ATTEMPTS = 3
+
+_STOP = object()
+
+
+class BasketWriteBehind:
+    """Queue basket mutations and commit them from a background thread.
+
+    Mutations are acknowledged once queued and committed later in batched
+    transactions, so requests do not wait for SQLite's commit. Reads of a
+    basket wait for that user's queued mutations first. Queued mutations are
+    lost if the process crashes; see "Basket write-behind" in the README for
+    the exact guarantees.
+    """
+
+    def __init__(self, connect, max_queue=10000, batch_size=500, read_timeout=5.0):
+        self._connect = connect
+        self.batch_size = batch_size
+        self.read_timeout = read_timeout
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._cond = threading.Condition()
+        self._thread = None
+        self._seq = 0
+        self._done_seq = 0
+        # Last queued sequence number per user with unflushed mutations
+        self._pending = {}
+        self._stats = {
+            'queued': 0,
+            'committed': 0,
+            'failed': 0,
+            'batches': 0,
+            'fallbacks': 0,
+        }
+
+    def _ensure_started(self):
+        # Started on first use so it runs in the process that serves requests
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name='basket-write-behind', daemon=True
+            )
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def submit(self, user_id, kind, params):
+        """
+        Queue a mutation for user_id.
+        Returns False if the queue is full and the caller must write
+        synchronously instead.
+        """
+        with self._cond:
+            self._ensure_started()
+            seq = self._seq + 1
+            try:
+                self._queue.put_nowait((seq, kind, params))
+            except queue.Full:
+                self._stats['fallbacks'] += 1
+                return False
+
+            self._seq = seq
+            self._pending[user_id] = seq
+            self._stats['queued'] += 1
+            return True
+
+    def wait_for_user(self, user_id, timeout=None):
+        """Wait until every queued mutation of user_id is committed."""
+        timeout = self.read_timeout if timeout is None else timeout
+        with self._cond:
+            seq = self._pending.get(user_id)
+            if seq is None:
+                return True
+
+            done = self._cond.wait_for(lambda: self._done_seq >= seq, timeout)
+            if not done:
+                logger.warning('Timed out waiting for basket writes of user %s', user_id)
+            return done
+
+    def flush(self, timeout=None):
+        """Wait until everything queued so far is committed."""
+        with self._cond:
+            seq = self._seq
+            return self._cond.wait_for(lambda: self._done_seq >= seq, timeout)
+
+    def stop(self):
+        """Flush the queue and stop the background thread."""
+        with self._cond:
+            thread = self._thread
+            self._thread = None
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join()
+
+    def stats(self):
+        """Return queue counters."""
+        with self._cond:
+            return dict(self._stats, pending=self._queue.qsize())
+
+    def _run(self):
+        conn = self._connect()
+        try:
+            while True:
+                batch = []
+                entry = self._queue.get()
+                # Everything queued while the previous batch was committing
+                # goes into the next transaction
+                while entry is not _STOP:
+                    batch.append(entry)
+                    if len(batch) >= self.batch_size:
+                        break
+                    try:
+                        entry = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+
+                if batch:
+                    self._write(conn, batch)
+                if entry is _STOP:
+                    return
+        finally:
+            conn.close()
+
+    def _write(self, conn, batch):
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                for kind, group in groupby(batch, key=lambda entry: entry[1]):
+                    conn.executemany(STATEMENTS[kind], [params for _, _, params in group])
+                conn.commit()
+                committed = True
+                break
+            except sqlite3.Error:
+                conn.rollback()
+                committed = False
+                if attempt == MAX_ATTEMPTS:
+                    logger.exception('Dropping %d basket writes after %d attempts',
+                                     len(batch), attempt)
+                else:
+                    time.sleep(0.05 * attempt)
+
+        with self._cond:
+            self._stats['batches'] += 1
+            self._stats['committed' if committed else 'failed'] += len(batch)
+            self._done_seq = batch[-1][0]
+            # Forget users whose mutations are all committed, including
+            # those who never read their basket again
+            self._pending = {
+                user_id: seq for user_id, seq in self._pending.items()
+                if seq > self._done_seq
+            }
+            self._cond.notify_all()
+
+
+def get_basket_writer():
+    """Return the current app's write-behind queue, or None if disabled."""
+    return current_app.extensions.get('basket_writer')
+
+
+def init_app(app):
+    """Create the write-behind queue when BASKET_WRITE_BEHIND is enabled."""
+    if not app.config['BASKET_WRITE_BEHIND']:
+        return
+
+    from app.db import get_pool
+
+    app.extensions['basket_writer'] = BasketWriteBehind(
+        get_pool(app).connect,
+        max_queue=app.config['BASKET_WRITE_BEHIND_QUEUE_SIZE'],
+        batch_size=app.config['BASKET_WRITE_BEHIND_BATCH_SIZE'],
+        read_timeout=app.config['BASKET_WRITE_BEHIND_READ_TIMEOUT'],
+    )
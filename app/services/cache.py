@@ -0,0 +1,103 @@
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+
+# Named caches created for every app: name -> (size config key, TTL config key)
+CACHES = {
+    'items': ('ITEM_CACHE_SIZE', 'ITEM_CACHE_TTL'),
+    'users': ('USER_CACHE_SIZE', 'USER_CACHE_TTL'),
+    'tokens': ('TOKEN_CACHE_SIZE', 'TOKEN_CACHE_TTL'),
+    'fragments': ('FRAGMENT_CACHE_SIZE', 'FRAGMENT_CACHE_TTL'),
+    'compressed': ('COMPRESSED_CACHE_SIZE', 'COMPRESSED_CACHE_TTL'),
+}
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after a time-to-live.
+
+    A maxsize of 0 disables the cache: nothing is stored and every lookup
+    is a miss.
+    """
+
+    def __init__(self, maxsize=256, ttl=60.0, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+        # Bumped by clear() so loads that raced an invalidation are dropped
+        self.generation = 0
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expired': 0}
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default if missing or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > self._clock():
+                    self._data.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return value
+                del self._data[key]
+                self._stats['expired'] += 1
+
+            self._stats['misses'] += 1
+            return default
+
+    def set(self, key, value, ttl=None, generation=None):
+        """Store a value, evicting the least recently used entry if full.
+
+        If generation is given and the cache was cleared since it was read,
+        the value is considered stale and not stored.
+        """
+        if self.maxsize <= 0:
+            return
+
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+
+            self._data[key] = (value, self._clock() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def pop(self, key):
+        """Remove a single entry."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._data.clear()
+            self.generation += 1
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        """Return hit/miss counters and the current size."""
+        with self._lock:
+            return dict(self._stats, size=len(self._data), maxsize=self.maxsize)
+
+def get_cache(name):
+    """Return the named cache of the current app."""
+    return current_app.extensions['caches'][name]
+
+def get_cache_stats():
+    """Return the counters of every cache of the current app."""
+    return {name: cache.stats() for name, cache in current_app.extensions['caches'].items()}
+
+def init_app(app):
+    """Create the app's named caches from config."""
+    app.extensions['caches'] = {
+        name: TTLCache(maxsize=app.config[size_key], ttl=app.config[ttl_key])
+        for name, (size_key, ttl_key) in CACHES.items()
+    }
@@ -0,0 +1,78 @@
+import gzip
+import zlib
+from flask import current_app, request
+from app.services.cache import get_cache
+
+# Content-Encoding tokens we can produce, in order of preference
+ENCODINGS = ('gzip', 'deflate')
+
+def _choose_encoding():
+    """Pick the preferred encoding the client accepts, or None."""
+    accepted = request.accept_encodings
+    best = None
+    best_quality = 0
+    for encoding in ENCODINGS:
+        quality = accepted[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+def compress(data, encoding, level):
+    """Compress a body with the given Content-Encoding."""
+    if encoding == 'gzip':
+        # Fixed mtime so equal bodies compress to equal bytes
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    return zlib.compress(data, level)
+
+def compress_response(response):
+    """
+    Compress text responses for clients that accept gzip or deflate.
+
+    Streamed, non-200 and small responses are sent as they are. Bodies of
+    responses with an ETag (the catalog API) are cached compressed, keyed
+    by path, query, ETag and encoding, so polling clients do not pay for
+    compression on every request. The ETag of a compressed response is
+    made weak because its bytes differ from the identity representation.
+    """
+    config = current_app.config
+
+    if (
+        not config['COMPRESSION_ENABLED']
+        or response.status_code != 200
+        or response.is_streamed
+        or response.direct_passthrough
+        or 'Content-Encoding' in response.headers
+        or response.mimetype not in config['COMPRESSION_MIMETYPES']
+    ):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = _choose_encoding()
+    if encoding is None:
+        return response
+
+    etag, weak = response.get_etag()
+    cache = get_cache('compressed')
+    key = None
+    body = None
+    if etag is not None:
+        key = (request.full_path, etag, encoding)
+        body = cache.get(key)
+
+    if body is None:
+        data = response.get_data()
+        if len(data) < config['COMPRESSION_MIN_SIZE']:
+            return response
+        body = compress(data, encoding, config['COMPRESSION_LEVEL'])
+        if key is not None:
+            cache.set(key, body)
+
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    if etag is not None and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+def init_app(app):
+    """Compress the app's responses after every request."""
+    app.after_request(compress_response)
@@ -0,0 +1,175 @@
+import random
+import sqlite3
+from itertools import accumulate, islice
+from app.db import get_db
+from app.services.item_service import _invalidate_catalog
+from app.services.user_service import hash_password
+
+# Words item names and descriptions are built from
+ADJECTIVES = (
+    'Compact', 'Wireless', 'Portable', 'Premium', 'Classic', 'Smart', 'Ergonomic',
+    'Rugged', 'Slim', 'Deluxe', 'Eco', 'Pro', 'Mini', 'Ultra', 'Vintage', 'Modular',
+)
+NOUNS = (
+    'Laptop', 'Smartphone', 'Headphones', 'Tablet', 'Smartwatch', 'Camera', 'Speaker',
+    'Keyboard', 'Mouse', 'Monitor', 'Charger', 'Backpack', 'Lamp', 'Chair', 'Desk',
+    'Router', 'Microphone', 'Projector', 'Printer', 'Drive',
+)
+FEATURES = (
+    'long battery life', 'fast charging', 'a water-resistant body', 'a two-year warranty',
+    'noise cancellation', 'a 4K display', 'Bluetooth 5.3', 'an aluminium frame',
+    'adjustable height', 'USB-C', 'a recycled fabric cover', 'a matte finish',
+)
+FIRST_NAMES = (
+    'Alex', 'Sam', 'Jordan', 'Taylor', 'Morgan', 'Casey', 'Riley', 'Jamie',
+    'Avery', 'Quinn', 'Ada', 'Emre', 'Elif', 'Deniz', 'Noah', 'Mia',
+)
+LAST_NAMES = (
+    'Smith', 'Yilmaz', 'Kaya', 'Garcia', 'Muller', 'Rossi', 'Dubois', 'Novak',
+    'Silva', 'Kowalski', 'Jensen', 'Tanaka', 'Brown', 'Demir', 'Celik', 'Lee',
+)
+
+DEFAULT_PASSWORD = 'Password123!'
+
+# Skew of item popularity in generated baskets: item of rank r is picked
+# with weight 1 / r**ZIPF_EXPONENT, so a few items appear in many baskets
+ZIPF_EXPONENT = 1.1
+
+def _chunks(rows, size):
+    """Split an iterable of rows into lists of at most size rows."""
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+def _insert(db, sql, rows, batch_size):
+    """Insert rows with executemany, batch_size rows per call."""
+    count = 0
+    for chunk in _chunks(rows, batch_size):
+        db.executemany(sql, chunk)
+        count += len(chunk)
+    return count
+
+def _insert_items(db, rng, count, batch_size):
+    """
+    Insert generated items with the per-row FTS trigger suspended, then
+    index all new rows with one INSERT ... SELECT, which is several times
+    faster. The trigger is dropped and recreated in the same immediate
+    transaction, so no other connection can write items without it.
+    """
+    db.execute('BEGIN IMMEDIATE')
+    start = db.execute('SELECT COALESCE(MAX(id), 0) FROM items').fetchone()[0] + 1
+    trigger = db.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'items_fts_after_insert'"
+    ).fetchone()
+    if trigger is not None:
+        db.execute('DROP TRIGGER items_fts_after_insert')
+
+    inserted = _insert(
+        db,
+        'INSERT INTO items (name, description, price, image_url) VALUES (?, ?, ?, ?)',
+        _item_rows(rng, count, start),
+        batch_size
+    )
+
+    if trigger is not None:
+        db.execute(
+            'INSERT INTO items_fts (rowid, name, description) '
+            'SELECT id, name, description FROM items WHERE id >= ?',
+            (start,)
+        )
+        db.execute(trigger[0])
+    db.commit()
+    return inserted
+
+def _item_rows(rng, count, start):
+    for n in range(start, start + count):
+        noun = rng.choice(NOUNS)
+        yield (
+            f'{rng.choice(ADJECTIVES)} {noun} {n}',
+            f'{noun} with {rng.choice(FEATURES)} and {rng.choice(FEATURES)}.',
+            # Log-normal prices: many cheap items, a few expensive ones
+            round(min(rng.lognormvariate(3.5, 1.0), 5000.0), 2),
+            'https://via.placeholder.com/150',
+        )
+
+def _user_rows(rng, count, start, password):
+    for n in range(start, start + count):
+        yield (
+            rng.choice(FIRST_NAMES),
+            rng.choice(LAST_NAMES),
+            f'user{n}@generated.example.com',
+            password,
+            f'{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.randint(1950, 2005)}',
+        )
+
+def _basket_rows(rng, user_ids, item_ids, baskets, basket_size):
+    # Popularity rank is random, not the insertion order
+    ranked = list(item_ids)
+    rng.shuffle(ranked)
+    cum_weights = list(accumulate(1 / rank ** ZIPF_EXPONENT for rank in range(1, len(ranked) + 1)))
+
+    for user_id in rng.sample(user_ids, baskets):
+        # Geometric-ish basket sizes around basket_size, at least one line
+        lines = 1 + int(rng.expovariate(1 / max(basket_size - 1, 0.01)))
+        for item_id in rng.choices(ranked, cum_weights=cum_weights, k=lines):
+            yield (user_id, item_id, rng.choices((1, 2, 3), weights=(8, 3, 1))[0])
+
+def generate_data(items=0, users=0, baskets=0, basket_size=3, seed=None,
+                  password=DEFAULT_PASSWORD, batch_size=10000):
+    """
+    Bulk-generate synthetic items, users and baskets.
+
+    Rows are inserted with executemany in one transaction per table. Every
+    generated user gets the same password, hashed once, and logs in as
+    user<N>@generated.example.com. Baskets go to randomly picked users
+    (existing ones included) and favour popular items along a Zipf-like
+    curve. The same seed on the same starting database produces the same
+    data.
+    """
+    rng = random.Random(seed)
+    db = get_db()
+    counts = {'items': 0, 'users': 0, 'basket_lines': 0}
+
+    try:
+        if items > 0:
+            counts['items'] = _insert_items(db, rng, items, batch_size)
+            _invalidate_catalog()
+
+        if users > 0:
+            start = db.execute('SELECT COALESCE(MAX(id), 0) FROM users').fetchone()[0] + 1
+            counts['users'] = _insert(
+                db,
+                'INSERT INTO users (first_name, last_name, email, password, date_of_birth) '
+                'VALUES (?, ?, ?, ?, ?)',
+                _user_rows(rng, users, start, hash_password(password)),
+                batch_size
+            )
+            db.commit()
+
+        if baskets > 0:
+            user_ids = [row[0] for row in db.execute('SELECT id FROM users ORDER BY id')]
+            item_ids = [row[0] for row in db.execute('SELECT id FROM items ORDER BY id')]
+            if not user_ids or not item_ids:
+                return {'success': False, 'message': 'Baskets need existing users and items', **counts}
+
+            counts['basket_lines'] = _insert(
+                db,
+                'INSERT INTO basket_items (user_id, item_id, quantity) VALUES (?, ?, ?) '
+                'ON CONFLICT (user_id, item_id) '
+                'DO UPDATE SET quantity = basket_items.quantity + excluded.quantity',
+                _basket_rows(rng, user_ids, item_ids, min(baskets, len(user_ids)), basket_size),
+                batch_size
+            )
+            db.commit()
+    except sqlite3.Error as e:
+        db.rollback()
+        return {'success': False, 'message': f"Database error: {e}", **counts}
+
+    message = (
+        f"Generated {counts['items']} items, {counts['users']} users "
+        f"and {counts['basket_lines']} basket lines"
+    )
+    return {'success': True, 'message': message, **counts}
@@ -0,0 +1,29 @@
+from flask import render_template, session
+from markupsafe import Markup
+from app.services.cache import get_cache
+from app.services.item_service import get_catalog_version
+
+def render_catalog_fragment(template, key, load):
+    """
+    Render a catalog partial, or return it from the fragment cache.
+
+    The cache key combines the catalog version with key (the query, page
+    and so on) and whether the visitor has a session, which decides if the
+    partial shows basket buttons. load() returns the template context and
+    only runs on a miss, so a hit skips both the query and the rendering.
+    Fragments of an older catalog version are never looked up again and
+    age out of the LRU.
+    """
+    etag, _ = get_catalog_version()
+    cache_key = (template, etag, bool(session.get('user_id'))) + tuple(key)
+    cache = get_cache('fragments')
+    html = cache.get(cache_key)
+    if html is None:
+        html = Markup(render_template(template, **load()))
+        cache.set(cache_key, html)
+
+    return html
+
+def get_fragment_cache_stats():
+    """Return hit/miss counters of the fragment cache."""
+    return get_cache('fragments').stats()
@@ -0,0 +1,107 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app, has_app_context
+
+
+class HashingBusyError(Exception):
+    """Raised when too many password hashes are already queued."""
+
+
+class HashingPool:
+    """Run password hashing on a bounded pool of worker threads.
+
+    hashlib's PBKDF2 releases the GIL while it runs, so worker threads hash
+    in parallel while request threads keep serving other requests. At most
+    ``workers + max_pending`` hashes are accepted at once; callers beyond
+    that wait up to ``queue_timeout`` seconds for a slot and then get
+    HashingBusyError, instead of piling up behind a login burst.
+    """
+
+    def __init__(self, workers=4, max_pending=32, queue_timeout=2.0):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+        self._lock = threading.Lock()
+        self._stats = {'submitted': 0, 'completed': 0, 'rejected': 0, 'in_flight': 0}
+
+    def _get_executor(self):
+        # Worker threads are only started once something needs hashing
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix='password-hash'
+                )
+            return self._executor
+
+    def _done(self, future):
+        self._slots.release()
+        with self._lock:
+            self._stats['completed'] += 1
+            self._stats['in_flight'] -= 1
+
+    def run(self, fn, *args):
+        """Run fn(*args) on a worker thread and wait for its result."""
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            with self._lock:
+                self._stats['rejected'] += 1
+            raise HashingBusyError('Too many password hashing requests queued')
+
+        with self._lock:
+            self._stats['submitted'] += 1
+            self._stats['in_flight'] += 1
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            with self._lock:
+                self._stats['in_flight'] -= 1
+            raise
+        future.add_done_callback(self._done)
+
+        return future.result()
+
+    def shutdown(self):
+        """Stop the worker threads once queued hashes have finished."""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    def stats(self):
+        """Return submission counters."""
+        with self._lock:
+            return dict(self._stats, workers=self.workers, max_pending=self.max_pending)
+
+
+def run_hash(fn, *args):
+    """Run a hashing function on the app's hashing pool.
+
+    Falls back to running inline outside an app context or when the pool
+    is disabled (PASSWORD_HASH_WORKERS = 0).
+    """
+    if has_app_context():
+        pool = current_app.extensions.get('hashing_pool')
+        if pool is not None:
+            return pool.run(fn, *args)
+
+    return fn(*args)
+
+
+def get_hashing_pool(app=None):
+    """Return the hashing pool of the given (or current) app, if enabled."""
+    app = app or current_app
+    return app.extensions.get('hashing_pool')
+
+
+def init_app(app):
+    """Create the app's hashing pool from config."""
+    workers = app.config['PASSWORD_HASH_WORKERS']
+    if workers > 0:
+        app.extensions['hashing_pool'] = HashingPool(
+            workers=workers,
+            max_pending=app.config['PASSWORD_HASH_MAX_PENDING'],
+            queue_timeout=app.config['PASSWORD_HASH_QUEUE_TIMEOUT'],
+        )
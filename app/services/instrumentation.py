@@ -0,0 +1,304 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+from flask import current_app, g, has_app_context, request, template_rendered, before_render_template
+
+# Timed parts of a request, in Server-Timing order
+METRICS = ('sql', 'jwt', 'hash', 'auth', 'render')
+
+# Statements per connection whose rows may still be fetched, for the slow
+# query log; the oldest is checked early beyond this
+MAX_OPEN_STATEMENTS = 256
+
+class RequestTimings:
+    """Time spent per metric, and SQL statement count, of one request."""
+
+    __slots__ = ('start', 'durations', 'queries', 'renders')
+
+    def __init__(self):
+        self.start = perf_counter()
+        self.durations = dict.fromkeys(METRICS, 0.0)
+        self.queries = 0
+        # Start times of templates being rendered, innermost last
+        self.renders = []
+
+def _current_timings():
+    if has_app_context():
+        return g.get('timings')
+    return None
+
+def record(metric, elapsed):
+    """Add elapsed seconds to a metric of the current request, if timed."""
+    timings = _current_timings()
+    if timings is not None:
+        timings.durations[metric] += elapsed
+
+@contextmanager
+def timed(metric):
+    """Time the enclosed block as part of metric."""
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        record(metric, perf_counter() - start)
+
+def _record_sql(elapsed, statements):
+    timings = _current_timings()
+    if timings is not None:
+        timings.durations['sql'] += elapsed
+        timings.queries += statements
+
+class _Statement:
+    """A statement whose time is still adding up while its rows are fetched."""
+
+    __slots__ = ('sql', 'parameters', 'elapsed', 'many')
+
+    def __init__(self, sql, parameters, elapsed, many):
+        self.sql = sql
+        self.parameters = parameters
+        self.elapsed = elapsed
+        self.many = many
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that adds its statements and fetch time to the request's SQL timing.
+
+    SQLite does most of the work of a query while its rows are fetched, so
+    for the slow query log the time of a statement is its execute time plus
+    the fetches that follow. It is checked against the threshold once the
+    rows are exhausted, the cursor runs another statement or is closed, or
+    the connection goes back to the pool, whichever comes first.
+    """
+
+    _statement = None
+
+    def _begin(self, sql, parameters, elapsed, many=False):
+        self._finish()
+        if self.connection.slow_query_log is None:
+            return
+        self._statement = _Statement(sql, parameters, elapsed, many)
+        if self.description is None:
+            # Nothing to fetch: the statement is complete
+            self._finish()
+        else:
+            self.connection.track_statement(self._statement)
+
+    def _fetched(self, elapsed, exhausted):
+        _record_sql(elapsed, 0)
+        statement = self._statement
+        if statement is not None:
+            statement.elapsed += elapsed
+            if exhausted:
+                self._finish()
+
+    def _finish(self):
+        statement = self._statement
+        if statement is not None:
+            self._statement = None
+            self.connection.finish_statement(statement)
+
+    def execute(self, sql, parameters=()):
+        start = perf_counter()
+        try:
+            result = super().execute(sql, parameters)
+        finally:
+            elapsed = perf_counter() - start
+            _record_sql(elapsed, 1)
+        self._begin(sql, parameters, elapsed)
+        return result
+
+    def executemany(self, sql, seq_of_parameters):
+        first = None
+        if self.connection.slow_query_log is not None:
+            # Keep the first parameter set so a slow batch can be explained
+            seq_of_parameters = list(seq_of_parameters)
+            first = seq_of_parameters[0] if seq_of_parameters else None
+        start = perf_counter()
+        try:
+            result = super().executemany(sql, seq_of_parameters)
+        finally:
+            elapsed = perf_counter() - start
+            _record_sql(elapsed, 1)
+        self._begin(sql, first, elapsed, many=True)
+        return result
+
+    def executescript(self, sql_script):
+        self._finish()
+        start = perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            _record_sql(perf_counter() - start, 1)
+
+    def fetchone(self):
+        start = perf_counter()
+        row = None
+        try:
+            row = super().fetchone()
+            return row
+        finally:
+            self._fetched(perf_counter() - start, row is None)
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        start = perf_counter()
+        rows = []
+        try:
+            rows = super().fetchmany(size)
+            return rows
+        finally:
+            self._fetched(perf_counter() - start, len(rows) < size)
+
+    def fetchall(self):
+        start = perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            self._fetched(perf_counter() - start, True)
+
+    def __next__(self):
+        start = perf_counter()
+        exhausted = True
+        try:
+            row = super().__next__()
+            exhausted = False
+            return row
+        finally:
+            self._fetched(perf_counter() - start, exhausted)
+
+    def close(self):
+        self._finish()
+        super().close()
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors, including the execute shortcuts, are instrumented."""
+
+    # Set per connection when the app has a slow query log
+    slow_query_log = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Statements whose rows may still be fetched, oldest first, for the
+        # slow query log
+        self._open_statements = {}
+
+    def track_statement(self, statement):
+        """Remember a statement until its cursor finishes it or finish_statements runs."""
+        if len(self._open_statements) >= MAX_OPEN_STATEMENTS:
+            # Long-lived contexts (CLI commands) never release the connection
+            self.finish_statement(next(iter(self._open_statements)))
+        self._open_statements[statement] = None
+
+    def finish_statement(self, statement):
+        """Hand a completed statement to the slow query log if it was slow."""
+        self._open_statements.pop(statement, None)
+        log = self.slow_query_log
+        if log is not None and statement.elapsed >= log.threshold:
+            log.record(self, statement.sql, statement.parameters, statement.elapsed, statement.many)
+
+    def finish_statements(self):
+        """Finish every statement whose rows were not read to the end."""
+        for statement in list(self._open_statements):
+            self.finish_statement(statement)
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    # The C shortcuts do not go through cursor(), so route them explicitly
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+class RequestStats:
+    """Per-endpoint totals of the request timings, for the stats endpoint."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def add(self, endpoint, total, timings):
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = dict(
+                    {'requests': 0, 'total': 0.0, 'max': 0.0, 'queries': 0},
+                    **dict.fromkeys(METRICS, 0.0)
+                )
+            stats['requests'] += 1
+            stats['total'] += total
+            stats['max'] = max(stats['max'], total)
+            stats['queries'] += timings.queries
+            for metric, elapsed in timings.durations.items():
+                stats[metric] += elapsed
+
+    def snapshot(self):
+        """Return count, average and maximum milliseconds per endpoint."""
+        with self._lock:
+            endpoints = {name: dict(stats) for name, stats in self._endpoints.items()}
+
+        report = {}
+        for name, stats in endpoints.items():
+            count = stats['requests']
+            report[name] = {
+                'requests': count,
+                'avg_ms': round(stats['total'] * 1000 / count, 3),
+                'max_ms': round(stats['max'] * 1000, 3),
+                'avg_queries': round(stats['queries'] / count, 2),
+                **{f'avg_{metric}_ms': round(stats[metric] * 1000 / count, 3) for metric in METRICS},
+            }
+        return report
+
+def get_request_stats():
+    """Return the aggregated request timings of the current app."""
+    return current_app.extensions['request_stats'].snapshot()
+
+def _start_timing():
+    g.timings = RequestTimings()
+
+def _finish_timing(response):
+    timings = g.pop('timings', None)
+    if timings is None:
+        return response
+
+    total = perf_counter() - timings.start
+    current_app.extensions['request_stats'].add(request.endpoint or 'unknown', total, timings)
+
+    if current_app.config['SERVER_TIMING_HEADER']:
+        entries = [f'total;dur={total * 1000:.2f}']
+        for metric in METRICS:
+            elapsed = timings.durations[metric]
+            if metric == 'sql':
+                entries.append(f'sql;dur={elapsed * 1000:.2f};desc="{timings.queries} queries"')
+            elif elapsed:
+                entries.append(f'{metric};dur={elapsed * 1000:.2f}')
+        response.headers['Server-Timing'] = ', '.join(entries)
+    return response
+
+def _template_started(sender, template, context, **extra):
+    timings = _current_timings()
+    if timings is not None:
+        timings.renders.append(perf_counter())
+
+def _template_finished(sender, template, context, **extra):
+    timings = _current_timings()
+    if timings is not None and timings.renders:
+        start = timings.renders.pop()
+        # Count nested renders once, as part of the outermost template
+        if not timings.renders:
+            timings.durations['render'] += perf_counter() - start
+
+def init_app(app):
+    """Time every request of the app when INSTRUMENTATION_ENABLED is set."""
+    if not app.config['INSTRUMENTATION_ENABLED']:
+        return
+
+    app.extensions['request_stats'] = RequestStats()
+    app.before_request(_start_timing)
+    app.after_request(_finish_timing)
+    before_render_template.connect(_template_started, app)
+    template_rendered.connect(_template_finished, app)
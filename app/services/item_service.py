@@ -1,37 +1,232 @@
+import re
+import json
+import base64
 import sqlite3
+import threading
+from datetime import datetime, timezone
+from flask import current_app, g
 from app.db import get_db
+from app.models import Item, execute
+from app.services.cache import get_cache
 
-def get_all_items():
-    """Get all items from the database."""
+# Relative weight of a match in the name vs. the description column
+SEARCH_WEIGHTS = (10.0, 1.0)
+
+_MISSING = object()
+
+class CatalogVersion:
+    """The catalog version this process last saw.
+
+    The version itself lives in the catalog_version table, bumped by
+    triggers on items. Remembering the last tag seen tells the process when
+    another one (a second worker, the CLI) changed the catalog, so its
+    cached catalog reads are dropped instead of served under the new tag.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.etag = None
+
+    def observe(self, etag):
+        """Record the current tag; returns True if it changed since the last call."""
+        with self._lock:
+            changed = etag != self.etag
+            self.etag = etag
+            return changed
+
+def get_catalog_version():
+    """Return the (etag, last_modified) pair of the current catalog.
+
+    Looked up with a primary key query at most once per request and shared
+    by the item cache, conditional GETs and the fragment cache. A change
+    made by another process drops this process's cached catalog reads.
+    """
+    version = g.get('catalog_version')
+    if version is None:
+        row = get_db().execute(
+            'SELECT tag, version, last_modified FROM catalog_version WHERE id = 1'
+        ).fetchone()
+        etag = f"{row['tag']}-{row['version']}"
+        if current_app.extensions['catalog_version'].observe(etag):
+            get_cache('items').clear()
+        last_modified = datetime.fromtimestamp(row['last_modified'], timezone.utc)
+        version = g.catalog_version = (etag, last_modified)
+
+    return version
+
+def _forget_catalog_version():
+    """Look the catalog version up again on the next read."""
+    g.pop('catalog_version', None)
+
+def _cached(key, load):
+    """Return a catalog read from the item cache, loading it on a miss.
+
+    Cached results are shared between requests and must not be mutated.
+    """
+    # Drops the cache first if the catalog changed in another process
+    get_catalog_version()
+    cache = get_cache('items')
+    value = cache.get(key, _MISSING)
+    if value is _MISSING:
+        generation = cache.generation
+        value = load()
+        cache.set(key, value, generation=generation)
+
+    return value
+
+def _invalidate_catalog():
+    """Drop cached catalog reads after a write (the triggers bump the version)."""
+    get_cache('items').clear()
+    _forget_catalog_version()
+
+def get_item_cache_stats():
+    """Return hit/miss counters of the catalog cache."""
+    return get_cache('items').stats()
+
+def get_all_items(limit=None, offset=0):
+    """Get items ordered by name, optionally only a limit/offset slice."""
+    return _cached(('all', limit, offset), lambda: _load_items(limit, offset))
+
+def _load_items(limit, offset):
     db = get_db()
-    items = db.execute(
-        'SELECT * FROM items ORDER BY name'
-    ).fetchall()
+    if limit is None:
+        items = execute(
+            db, Item, 'SELECT * FROM items ORDER BY name, id'
+        ).fetchall()
+    else:
+        items = execute(
+            db, Item, 'SELECT * FROM items ORDER BY name, id LIMIT ? OFFSET ?',
+            (limit, offset)
+        ).fetchall()
     
-    return [dict(item) for item in items]
+    return items
+
+def encode_cursor(item):
+    """Encode the (name, id) position of an item as an opaque cursor token."""
+    position = json.dumps([item['name'], item['id']]).encode('utf-8')
+    return base64.urlsafe_b64encode(position).decode('ascii')
+
+def decode_cursor(cursor):
+    """Decode a cursor token into a (name, id) pair.
+
+    Raises ValueError if the token is malformed.
+    """
+    try:
+        name, item_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+    if not isinstance(name, str) or not isinstance(item_id, int):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+
+    return name, item_id
+
+def get_items_page(limit, cursor=None):
+    """Get one page of items ordered by name, continuing after a cursor.
+
+    Keyset pagination: the page is found through the items(name) index
+    instead of skipping rows, so late pages cost the same as the first one.
+    Returns the items and the cursor of the next page (None on the last page).
+    """
+    position = None if cursor is None else decode_cursor(cursor)
+    return _cached(('page', limit, position), lambda: _load_items_page(limit, position))
+
+def _load_items_page(limit, position):
+    db = get_db()
+    if position is None:
+        items = execute(
+            db, Item, 'SELECT * FROM items ORDER BY name, id LIMIT ?',
+            (limit + 1,)
+        ).fetchall()
+    else:
+        items = execute(
+            db, Item, 'SELECT * FROM items WHERE (name, id) > (?, ?) ORDER BY name, id LIMIT ?',
+            (*position, limit + 1)
+        ).fetchall()
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(items[-1])
+
+    return {'items': items, 'next_cursor': next_cursor}
 
 def get_item_by_id(item_id):
     """Get an item by its ID."""
+    return _cached(('item', item_id), lambda: _load_item(item_id))
+
+def _load_item(item_id):
     db = get_db()
-    item = db.execute(
-        'SELECT * FROM items WHERE id = ?',
+    return execute(
+        db, Item, 'SELECT * FROM items WHERE id = ?',
         (item_id,)
     ).fetchone()
-    
-    if item is None:
+
+def build_search_query(query):
+    """Turn user input into an FTS5 query matching every word as a prefix.
+
+    Returns None if the input has no searchable words.
+    """
+    terms = re.findall(r'\w+', query)
+    if not terms:
         return None
-    
-    return dict(item)
 
-def search_items(query):
-    """Search for items by name."""
+    return ' '.join(f'"{term}"*' for term in terms)
+
+def search_items(query, limit=None, offset=0):
+    """Search for items by name and description, best matches first."""
+    return _cached(('search', query, limit, offset), lambda: _load_search(query, limit, offset))
+
+def _search_cursor(query, limit=None, offset=0):
     db = get_db()
-    items = db.execute(
-        'SELECT * FROM items WHERE name LIKE ? ORDER BY name',
-        (f'%{query}%',)
-    ).fetchall()
-    
-    return [dict(item) for item in items]
+    match = build_search_query(query)
+    # LIMIT -1 means no limit in SQLite
+    page = (-1 if limit is None else limit, offset)
+
+    if match is None:
+        # Punctuation-only input cannot use the index; match it literally
+        pattern = re.sub(r'([\\%_])', r'\\\1', query)
+        return execute(
+            db, Item,
+            "SELECT * FROM items WHERE name LIKE ? ESCAPE '\\' ORDER BY name LIMIT ? OFFSET ?",
+            (f'%{pattern}%', *page)
+        )
+
+    return execute(
+        db, Item,
+        '''
+        SELECT items.*
+        FROM items_fts
+        JOIN items ON items.id = items_fts.rowid
+        WHERE items_fts MATCH ?
+        ORDER BY bm25(items_fts, ?, ?), items.name
+        LIMIT ? OFFSET ?
+        ''',
+        (match, *SEARCH_WEIGHTS, *page)
+    )
+
+def _load_search(query, limit, offset):
+    return _search_cursor(query, limit, offset).fetchall()
+
+def _iter_rows(cursor, chunk_size):
+    """Yield rows, fetching chunk_size rows from SQLite at a time."""
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield from rows
+
+def iter_items(chunk_size=500):
+    """
+    Yield every item ordered by name without loading the catalog at once.
+    Bypasses the item cache; meant for streaming full exports.
+    """
+    cursor = execute(get_db(), Item, 'SELECT * FROM items ORDER BY name, id')
+    return _iter_rows(cursor, chunk_size)
+
+def iter_search_items(query, chunk_size=500):
+    """Yield every search result, best matches first, without the item cache."""
+    return _iter_rows(_search_cursor(query), chunk_size)
 
 def add_item(name, description, price, image_url=None):
     """Add a new item to the database."""
@@ -42,6 +237,7 @@ def add_item(name, description, price, image_url=None):
             (name, description, price, image_url)
         )
         db.commit()
+        _invalidate_catalog()
         return {'success': True, 'message': 'Item added successfully'}
     except sqlite3.Error as e:
         return {'success': False, 'message': f"Database error: {e}"}
@@ -55,6 +251,7 @@ def update_item(item_id, name, description, price, image_url=None):
             (name, description, price, image_url, item_id)
         )
         db.commit()
+        _invalidate_catalog()
         return {'success': True, 'message': 'Item updated successfully'}
     except sqlite3.Error as e:
         return {'success': False, 'message': f"Database error: {e}"}
@@ -65,6 +262,7 @@ def delete_item(item_id):
     try:
         db.execute('DELETE FROM items WHERE id = ?', (item_id,))
         db.commit()
+        _invalidate_catalog()
         return {'success': True, 'message': 'Item deleted successfully'}
     except sqlite3.Error as e:
         return {'success': False, 'message': f"Database error: {e}"}
@@ -146,4 +344,11 @@ def generate_sample_items():
             pass
     
     db.commit()
+    _invalidate_catalog()
     return {'success': True, 'message': f'Added {len(sample_items)} sample items'}
+
+def init_app(app):
+    """Track the catalog version the app's caches were filled at."""
+    app.extensions['catalog_version'] = CatalogVersion()
+    # g can outlive a request (e.g. an app context pushed around several)
+    app.before_request(_forget_catalog_version)
@@ -0,0 +1,209 @@
+import bisect
+import threading
+import weakref
+from time import perf_counter
+from flask import current_app, g, request
+from app.db import get_pool_stats
+from app.services.cache import get_cache_stats
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+class MetricsRegistry:
+    """In-process counters and histograms in Prometheus' data model.
+
+    Every thread updates its own shard, so recording takes no lock; a
+    scrape sums the shards. Shards of threads that have exited are folded
+    into a retired total, so their counts survive the thread.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # name -> (type, help text)
+        self._descriptions = {}
+        # id(slot) -> (counters, histograms) of live threads
+        self._live = {}
+        self._retired = ({}, {})
+
+    def describe(self, name, kind, text):
+        """Declare the TYPE and HELP lines of a metric."""
+        self._descriptions[name] = (kind, text)
+
+    def _shard(self):
+        slot = getattr(self._local, 'slot', None)
+        if slot is None:
+            slot = self._local.slot = _ThreadSlot()
+            with self._lock:
+                self._live[id(slot)] = (slot.counters, slot.histograms)
+            weakref.finalize(slot, self._retire, id(slot))
+        return slot
+
+    def _retire(self, key):
+        with self._lock:
+            counters, histograms = self._live.pop(key)
+            _merge(self._retired, counters, histograms)
+
+    def inc(self, name, labels=(), value=1):
+        """Add value to a counter; labels is a tuple of (name, value) pairs."""
+        counters = self._shard().counters
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + value
+
+    def observe(self, name, value, labels=()):
+        """Record one observation in a histogram."""
+        histograms = self._shard().histograms
+        key = (name, labels)
+        counts = histograms.get(key)
+        if counts is None:
+            # One count per bucket, then +Inf, then the sum of observations
+            counts = histograms[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def collect(self):
+        """Return (counters, histograms) summed over every thread."""
+        with self._lock:
+            total = ({}, {})
+            _merge(total, *self._retired)
+            for counters, histograms in self._live.values():
+                # dict() and list() copies are atomic under the GIL, so a
+                # thread recording meanwhile cannot break the iteration
+                histograms = {key: list(counts) for key, counts in dict(histograms).items()}
+                _merge(total, dict(counters), histograms)
+        return total
+
+    def render(self, gauges=()):
+        """
+        Render all metrics in the Prometheus text exposition format.
+        gauges is an iterable of (name, labels, value) read at scrape time.
+        """
+        counters, histograms = self.collect()
+        samples = {}
+        for (name, labels), value in sorted(counters.items()):
+            samples.setdefault(name, []).append((name, labels, value))
+        for (name, labels), counts in sorted(histograms.items()):
+            lines = samples.setdefault(name, [])
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append((f'{name}_bucket', labels + (('le', str(bound)),), cumulative))
+            lines.append((f'{name}_sum', labels, counts[-1]))
+            lines.append((f'{name}_count', labels, cumulative))
+        for name, labels, value in gauges:
+            samples.setdefault(name, []).append((name, labels, value))
+
+        output = []
+        for name in sorted(samples):
+            kind, text = self._descriptions.get(name, ('untyped', ''))
+            if text:
+                output.append(f'# HELP {name} {text}')
+            output.append(f'# TYPE {name} {kind}')
+            for sample, labels, value in samples[name]:
+                output.append(f'{sample}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(output) + '\n'
+
+class _ThreadSlot:
+    """Per-thread metric values (weak-referenceable)."""
+
+    __slots__ = ('counters', 'histograms', '__weakref__')
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+
+def _merge(total, counters, histograms):
+    total_counters, total_histograms = total
+    for key, value in counters.items():
+        total_counters[key] = total_counters.get(key, 0) + value
+    for key, counts in histograms.items():
+        existing = total_histograms.get(key)
+        if existing is None:
+            total_histograms[key] = list(counts)
+        else:
+            for index, count in enumerate(counts):
+                existing[index] += count
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+def get_metrics():
+    """Return the metrics registry of the current app."""
+    return current_app.extensions['metrics']
+
+def _scrape_gauges():
+    """Yield cache and connection pool values as gauges/counters."""
+    for cache, stats in get_cache_stats().items():
+        labels = (('cache', cache),)
+        lookups = stats['hits'] + stats['misses']
+        yield 'shop_cache_hits_total', labels, stats['hits']
+        yield 'shop_cache_misses_total', labels, stats['misses']
+        yield 'shop_cache_evictions_total', labels, stats['evictions']
+        yield 'shop_cache_entries', labels, stats['size']
+        yield 'shop_cache_hit_ratio', labels, stats['hits'] / lookups if lookups else 0.0
+
+    pool = get_pool_stats()
+    yield 'shop_db_pool_connections', (('state', 'open'),), pool['open']
+    yield 'shop_db_pool_connections', (('state', 'in_use'),), pool['in_use']
+    yield 'shop_db_pool_connections', (('state', 'idle'),), pool['open'] - pool['in_use']
+    yield 'shop_db_pool_size', (), pool['size']
+    for event in ('created', 'reused', 'closed', 'discarded'):
+        yield f'shop_db_pool_{event}_total', (), pool[event]
+
+def render_metrics():
+    """Render the current app's metrics, including scrape-time gauges."""
+    return get_metrics().render(_scrape_gauges())
+
+def _start_request():
+    g.metrics_start = perf_counter()
+
+def _record_request(response):
+    start = g.pop('metrics_start', None)
+    if start is None:
+        return response
+
+    registry = current_app.extensions['metrics']
+    endpoint = (('blueprint', request.blueprint or ''), ('endpoint', request.endpoint or 'unmatched'))
+    registry.inc(
+        'shop_http_requests_total',
+        endpoint + (('method', request.method), ('status', str(response.status_code)))
+    )
+    registry.observe('shop_http_request_duration_seconds', perf_counter() - start, endpoint)
+    return response
+
+def init_app(app):
+    """Record request counts and latencies when METRICS_ENABLED is set."""
+    if not app.config['METRICS_ENABLED']:
+        return
+
+    registry = MetricsRegistry()
+    registry.describe('shop_http_requests_total', 'counter',
+                      'Requests handled, by endpoint, method and status.')
+    registry.describe('shop_http_request_duration_seconds', 'histogram',
+                      'Time from the start of a request until its response was built.')
+    registry.describe('shop_cache_hits_total', 'counter', 'Cache lookups that found an entry.')
+    registry.describe('shop_cache_misses_total', 'counter', 'Cache lookups that found nothing.')
+    registry.describe('shop_cache_evictions_total', 'counter', 'Entries evicted to make room.')
+    registry.describe('shop_cache_entries', 'gauge', 'Entries currently cached.')
+    registry.describe('shop_cache_hit_ratio', 'gauge', 'Hits divided by lookups since start.')
+    registry.describe('shop_db_pool_connections', 'gauge', 'SQLite connections by state.')
+    registry.describe('shop_db_pool_size', 'gauge', 'Connections the pool keeps open.')
+    registry.describe('shop_db_pool_created_total', 'counter', 'Connections opened.')
+    registry.describe('shop_db_pool_reused_total', 'counter', 'Checkouts served by a warm connection.')
+    registry.describe('shop_db_pool_closed_total', 'counter', 'Connections closed.')
+    registry.describe('shop_db_pool_discarded_total', 'counter', 'Broken connections thrown away.')
+
+    app.extensions['metrics'] = registry
+    app.before_request(_start_request)
+    app.after_request(_record_request)
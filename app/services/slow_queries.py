@@ -0,0 +1,161 @@
+import logging
+import re
+import sqlite3
+import threading
+import time
+from itertools import groupby
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+# Statements EXPLAIN QUERY PLAN can describe
+_EXPLAINABLE = re.compile(r'\s*(SELECT|WITH|INSERT|UPDATE|DELETE|REPLACE)\b', re.IGNORECASE)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_SPACE = re.compile(r'\s+')
+
+def normalize_sql(sql):
+    """
+    Reduce a statement to its shape: literals become ?, IN lists become
+    (...) and whitespace is collapsed, so variants aggregate together.
+    """
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _IN_LIST.sub(lambda match: '(?)' if match.group(0).count('?') == 1 else '(...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+def parameter_shape(parameters, many=False):
+    """
+    Describe the parameters by type only, e.g. 'int, str*3'; values are
+    never kept. For executemany, parameters is the first parameter set.
+    """
+    if many:
+        shape = parameter_shape(parameters)
+        return f'executemany: {shape}' if shape else 'executemany'
+    if not parameters:
+        return ''
+    if isinstance(parameters, dict):
+        return ', '.join(f':{name}={type(value).__name__}' for name, value in parameters.items())
+
+    runs = []
+    for name, run in groupby(type(value).__name__ for value in parameters):
+        count = len(list(run))
+        runs.append(name if count == 1 else f'{name}*{count}')
+    return ', '.join(runs)
+
+def explain(conn, sql, parameters):
+    """
+    Return the EXPLAIN QUERY PLAN lines of a statement, indented by depth.
+    Runs on a plain sqlite3 cursor, so it is neither timed nor logged.
+    """
+    if not _EXPLAINABLE.match(sql):
+        return []
+
+    try:
+        rows = sqlite3.Cursor(conn).execute(f'EXPLAIN QUERY PLAN {sql}', parameters or ()).fetchall()
+    except sqlite3.Error as e:
+        return [f'(plan unavailable: {e})']
+
+    depth = {0: -1}
+    plan = []
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        plan.append('  ' * depth[node_id] + detail)
+    return plan
+
+def full_scans(plan):
+    """Return the plan lines that read a whole table or index."""
+    return [
+        line.strip() for line in plan
+        if line.strip().startswith('SCAN ') and 'VIRTUAL TABLE' not in line
+    ]
+
+class SlowQueryLog:
+    """Statements slower than a threshold, aggregated by normalized SQL.
+
+    The query plan is captured the first time a statement shape is seen
+    slow. At most ``max_entries`` shapes are kept; slow statements of new
+    shapes beyond that are only counted as dropped.
+    """
+
+    def __init__(self, threshold_ms=100, max_entries=200):
+        self.threshold = threshold_ms / 1000
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.dropped = 0
+
+    def record(self, conn, sql, parameters, elapsed, many=False):
+        """Add one slow execution of sql (for executemany, with its first parameter set)."""
+        key = normalize_sql(sql)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and len(self._entries) >= self.max_entries:
+                self.dropped += 1
+                return
+
+        if entry is None:
+            # Explained outside the lock; a concurrent first sighting of the
+            # same shape just explains it twice
+            plan = explain(conn, sql, parameters)
+            entry = {
+                'sql': key,
+                'parameters': parameter_shape(parameters, many),
+                'plan': plan,
+                'full_scans': full_scans(plan),
+                'count': 0,
+                'total': 0.0,
+                'max': 0.0,
+                'last_seen': None,
+            }
+            logger.warning(
+                'Slow query (%.1f ms): %s\n%s', elapsed * 1000, key, '\n'.join(plan)
+            )
+            with self._lock:
+                entry = self._entries.setdefault(key, entry)
+
+        with self._lock:
+            entry['count'] += 1
+            entry['total'] += elapsed
+            entry['max'] = max(entry['max'], elapsed)
+            entry['last_seen'] = time.time()
+
+    def snapshot(self):
+        """Return the aggregated entries, largest total time first."""
+        with self._lock:
+            entries = [dict(entry) for entry in self._entries.values()]
+
+        report = []
+        for entry in sorted(entries, key=lambda entry: entry['total'], reverse=True):
+            total = entry.pop('total')
+            report.append(dict(
+                entry,
+                total_ms=round(total * 1000, 3),
+                avg_ms=round(total * 1000 / entry['count'], 3),
+                max_ms=round(entry.pop('max') * 1000, 3),
+            ))
+        return report
+
+    def clear(self):
+        """Forget every entry."""
+        with self._lock:
+            self._entries.clear()
+            self.dropped = 0
+
+def get_slow_query_log(app=None):
+    """Return the slow query log of the given (or current) app, if enabled."""
+    app = app or current_app
+    return app.extensions.get('slow_query_log')
+
+def init_app(app):
+    """Create the slow query log when instrumentation and a threshold are set."""
+    threshold = app.config['SLOW_QUERY_THRESHOLD_MS']
+    if not app.config['INSTRUMENTATION_ENABLED'] or threshold is None:
+        return
+
+    app.extensions['slow_query_log'] = SlowQueryLog(
+        threshold_ms=threshold,
+        max_entries=app.config['SLOW_QUERY_LOG_SIZE'],
+    )
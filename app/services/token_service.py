@@ -1,6 +1,10 @@
 import jwt
+import time
+import hashlib
 import datetime
 from flask import current_app
+from app.services.cache import get_cache
+from app.services.instrumentation import timed
 
 
 def generate_token(user_id):
@@ -11,19 +15,51 @@ def generate_token(user_id):
         "sub": str(user_id),  # Convert user_id to string
     }
 
-    return jwt.encode(
-        payload, current_app.config.get("SECRET_KEY", "dev"), algorithm="HS256"
-    )
+    with timed("jwt"):
+        return jwt.encode(
+            payload, current_app.config.get("SECRET_KEY", "dev"), algorithm="HS256"
+        )
+
+
+def _token_key(token):
+    """Cache key for a token; the raw bearer token is not kept in memory."""
+    return hashlib.sha256(token.encode("utf-8")).digest()
 
 
 def decode_token(token):
-    """Decode a JWT token."""
+    """Decode a JWT token.
+
+    Successful decodes are remembered until the token expires, so a client
+    presenting the same token again skips signature verification.
+    """
+    cache = get_cache("tokens")
+    key = _token_key(token)
+
+    cached = cache.get(key)
+    if cached is not None:
+        user_id, expires_at = cached
+        if expires_at > time.time():
+            return {"success": True, "user_id": user_id}
+        cache.pop(key)
+        return {"success": False, "message": "Token expired. Please log in again."}
+
     try:
-        payload = jwt.decode(
-            token, current_app.config.get("SECRET_KEY", "dev"), algorithms=["HS256"]
-        )
-        return {"success": True, "user_id": payload["sub"]}
+        with timed("jwt"):
+            payload = jwt.decode(
+                token, current_app.config.get("SECRET_KEY", "dev"), algorithms=["HS256"]
+            )
     except jwt.ExpiredSignatureError:
         return {"success": False, "message": "Token expired. Please log in again."}
     except jwt.InvalidTokenError:
         return {"success": False, "message": "Invalid token. Please log in again."}
+
+    expires_at = payload.get("exp")
+    if expires_at is not None:
+        cache.set(key, (payload["sub"], expires_at), ttl=min(cache.ttl, expires_at - time.time()))
+
+    return {"success": True, "user_id": payload["sub"]}
+
+
+def get_token_cache_stats():
+    """Return hit/miss counters of the decoded token cache."""
+    return get_cache("tokens").stats()
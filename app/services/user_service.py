@@ -1,9 +1,21 @@
 import sqlite3
 import hashlib
+import hmac
 import secrets
 import re
 from datetime import datetime
+from flask import current_app, has_app_context
 from app.db import get_db
+from app.models import User, execute
+from app.services.cache import get_cache
+from app.services.hashing_service import run_hash, HashingBusyError
+from app.services.instrumentation import timed
+
+BUSY_MESSAGE = 'Server is busy. Please try again shortly.'
+
+PASSWORD_HASH_ALGORITHM = 'pbkdf2_sha256'
+# Iterations of hashes stored before the versioned format, and the default
+DEFAULT_PASSWORD_ITERATIONS = 100000
 
 def validate_name(name):
     """Validate that a name is at least 2 characters."""
@@ -59,25 +71,93 @@ def validate_date_of_birth(date_str):
     except ValueError:
         return False, "Invalid date. Please use a valid date in format dd/mm/yyyy."
 
-def hash_password(password, salt=None):
-    """Hash a password for storing."""
+def _password_iterations():
+    """PBKDF2 iteration count for new hashes, from config when available."""
+    if has_app_context():
+        return current_app.config['PASSWORD_HASH_ITERATIONS']
+    return DEFAULT_PASSWORD_ITERATIONS
+
+def _pbkdf2(password, salt, iterations):
+    # Runs on the hashing pool when one is configured; the time includes
+    # waiting for a worker
+    with timed('hash'):
+        return run_hash(
+            hashlib.pbkdf2_hmac,
+            'sha256', 
+            password.encode('utf-8'), 
+            salt.encode('utf-8'), 
+            iterations
+        )
+
+def hash_password(password, salt=None, iterations=None):
+    """Hash a password for storing as algorithm$iterations$salt$hash."""
     if salt is None:
         salt = secrets.token_hex(16)
+    if iterations is None:
+        iterations = _password_iterations()
     
-    # Create a hash with salt
-    pwdhash = hashlib.pbkdf2_hmac(
-        'sha256', 
-        password.encode('utf-8'), 
-        salt.encode('utf-8'), 
-        100000
-    ).hex()
+    pwdhash = _pbkdf2(password, salt, iterations).hex()
     
-    return f"{salt}${pwdhash}"
+    return f"{PASSWORD_HASH_ALGORITHM}${iterations}${salt}${pwdhash}"
+
+def parse_password_hash(stored_password):
+    """
+    Split a stored password into (algorithm, iterations, salt, hash).
+    Hashes stored before the versioned format ("salt$hash") are read as
+    PBKDF2-SHA256 with the original 100000 iterations.
+    """
+    parts = stored_password.split('$')
+    if len(parts) == 2:
+        salt, pwdhash = parts
+        return PASSWORD_HASH_ALGORITHM, DEFAULT_PASSWORD_ITERATIONS, salt, pwdhash
+    
+    if len(parts) == 4 and parts[1].isdigit():
+        algorithm, iterations, salt, pwdhash = parts
+        return algorithm, int(iterations), salt, pwdhash
+    
+    raise ValueError("Unrecognized password hash format")
 
 def verify_password(stored_password, provided_password):
     """Verify a stored password against a provided password."""
-    salt, stored_hash = stored_password.split('$')
-    return stored_password == hash_password(provided_password, salt)
+    try:
+        algorithm, iterations, salt, stored_hash = parse_password_hash(stored_password)
+    except ValueError:
+        return False
+    
+    if algorithm != PASSWORD_HASH_ALGORITHM:
+        return False
+    
+    # Hash once with the stored parameters and compare in constant time
+    pwdhash = _pbkdf2(provided_password, salt, iterations).hex()
+    return hmac.compare_digest(pwdhash, stored_hash)
+
+def password_needs_rehash(stored_password):
+    """Check whether a stored password uses outdated hashing parameters."""
+    try:
+        algorithm, iterations, _, _ = parse_password_hash(stored_password)
+    except ValueError:
+        return False
+    
+    legacy_format = stored_password.count('$') == 1
+    return (
+        legacy_format
+        or algorithm != PASSWORD_HASH_ALGORITHM
+        or iterations != _password_iterations()
+    )
+
+def _rehash_password(db, user_id, password):
+    """Store the password again with the current hashing parameters."""
+    try:
+        db.execute(
+            'UPDATE users SET password = ? WHERE id = ?',
+            (hash_password(password), user_id)
+        )
+        db.commit()
+    except (sqlite3.Error, HashingBusyError):
+        # The old hash still works; try again on the next login
+        return
+    
+    invalidate_cached_user(user_id)
 
 def register_user(first_name, last_name, email, password, date_of_birth):
     """Register a new user with validation."""
@@ -106,7 +186,10 @@ def register_user(first_name, last_name, email, password, date_of_birth):
             return {'success': False, 'message': 'User already exists'}
         
         # Store the user
-        hashed_password = hash_password(password)
+        try:
+            hashed_password = hash_password(password)
+        except HashingBusyError:
+            return {'success': False, 'message': BUSY_MESSAGE, 'busy': True}
         db.execute(
             'INSERT INTO users (first_name, last_name, email, password, date_of_birth) '
             'VALUES (?, ?, ?, ?, ?)',
@@ -122,30 +205,54 @@ def authenticate_user(email, password):
     db = get_db()
     error = None
     
-    user = db.execute(
-        'SELECT * FROM users WHERE email = ?', (email,)
+    user = execute(
+        db, User, 'SELECT * FROM users WHERE email = ?', (email,)
     ).fetchone()
     
     if user is None:
         error = 'Incorrect email'
-    elif not verify_password(user['password'], password):
-        error = 'Incorrect password'
+    else:
+        try:
+            if not verify_password(user['password'], password):
+                error = 'Incorrect password'
+        except HashingBusyError:
+            return {'success': False, 'message': BUSY_MESSAGE, 'busy': True}
     
     if error is None:
-        return {'success': True, 'user': dict(user)}
+        if password_needs_rehash(user['password']):
+            _rehash_password(db, user['id'], password)
+        return {'success': True, 'user': user}
     
     return {'success': False, 'message': error}
 
 def get_user_by_id(user_id):
     """Get a user by ID."""
     db = get_db()
-    user = db.execute(
+    return execute(
+        db, User,
         'SELECT id, first_name, last_name, email, date_of_birth, created_at '
         'FROM users WHERE id = ?', 
         (user_id,)
     ).fetchone()
-    
+
+
+def get_cached_user(user_id):
+    """Get a user by ID through the user cache.
+
+    Used on every authenticated request; the returned User is shared
+    between requests and must not be mutated. Unknown IDs are not cached.
+    """
+    cache = get_cache('users')
+    user_id = int(user_id)
+    user = cache.get(user_id)
     if user is None:
-        return None
-    
-    return dict(user)
+        generation = cache.generation
+        user = get_user_by_id(user_id)
+        if user is not None:
+            cache.set(user_id, user, generation=generation)
+
+    return user
+
+def invalidate_cached_user(user_id):
+    """Drop a user from the user cache after their row changed."""
+    get_cache('users').pop(int(user_id))
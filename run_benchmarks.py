@@ -0,0 +1,327 @@
+#!/usr/bin/env python
+"""
+Benchmark the shop's HTTP endpoints and report latency percentiles as JSON.
+
+Seeds a temporary database with a configurable catalog, users and baskets,
+then drives each scenario through the Flask test client (in-process, no
+network) and through a real threaded WSGI server (werkzeug), recording
+throughput and p50/p95/p99 latency. Save the JSON output of two commits
+and compare them to spot regressions.
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from werkzeug.serving import WSGIRequestHandler, make_server
+from app import create_app
+from app.db import get_db, get_pool, init_db
+from app.services.data_generator import generate_data
+from app.services.hashing_service import get_hashing_pool
+
+PASSWORD = "Password123!"
+
+# Search terms; every one of them appears in generated item names
+SEARCH_TERMS = ("laptop", "smartphone", "camera", "speaker", "keyboard", "monitor", "lamp", "desk")
+
+SCENARIOS = ("login", "items", "search", "basket", "basket_add")
+TRANSPORTS = ("client", "server")
+
+
+def seed(app, items, users, baskets, seed):
+    """Fill a fresh database with generated items, users and baskets."""
+    with app.app_context():
+        init_db()
+        result = generate_data(
+            items=items, users=users, baskets=baskets, seed=seed, password=PASSWORD
+        )
+        if not result["success"]:
+            raise RuntimeError(result["message"])
+        # Generated users log in as user<id>@generated.example.com
+        rows = get_db().execute(
+            "SELECT email FROM users WHERE email LIKE '%@generated.example.com' ORDER BY id"
+        )
+        return [row["email"] for row in rows]
+
+
+def build_request(scenario, i, context):
+    """Return (method, path, json body, headers) of request i of a scenario."""
+    token = context["tokens"][i % len(context["tokens"])]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    if scenario == "login":
+        email = context["emails"][i % len(context["emails"])]
+        body = {"email": email, "password": PASSWORD}
+        return "POST", "/auth/api/login", body, {}
+    if scenario == "items":
+        return "GET", "/shop/api/items?limit=24", None, headers
+    if scenario == "search":
+        return "GET", f"/shop/api/search?query={SEARCH_TERMS[i % len(SEARCH_TERMS)]}", None, headers
+    if scenario == "basket":
+        return "GET", "/shop/api/basket", None, headers
+    if scenario == "basket_add":
+        item_id = i % context["items"] + 1
+        body = [{"op": "add", "item_id": item_id, "quantity": 1}]
+        return "POST", "/shop/api/basket/batch", body, headers
+    raise ValueError(f"Unknown scenario: {scenario}")
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return None
+    index = max(0, min(len(ordered) - 1, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(scenario, transport, latencies, errors, elapsed):
+    """Turn raw latencies (seconds) into the result record of one run."""
+    ordered = sorted(latencies)
+    ms = lambda value: None if value is None else round(value * 1000, 3)
+    return {
+        "scenario": scenario,
+        "transport": transport,
+        "requests": len(latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "latency_ms": {
+            "p50": ms(percentile(ordered, 0.50)),
+            "p95": ms(percentile(ordered, 0.95)),
+            "p99": ms(percentile(ordered, 0.99)),
+            "mean": ms(sum(ordered) / len(ordered)) if ordered else None,
+            "max": ms(ordered[-1]) if ordered else None,
+        },
+    }
+
+
+def run_client(app, scenario, requests, warmup, context):
+    """Run a scenario sequentially through the Flask test client."""
+    client = app.test_client()
+
+    def send(i):
+        method, path, body, headers = build_request(scenario, i, context)
+        response = client.open(path, method=method, json=body, headers=headers)
+        return response.status_code
+
+    for i in range(warmup):
+        send(i)
+
+    latencies = []
+    errors = 0
+    started = time.perf_counter()
+    for i in range(requests):
+        begin = time.perf_counter()
+        status = send(i)
+        latencies.append(time.perf_counter() - begin)
+        errors += status >= 400
+    return summarize(scenario, "client", latencies, errors, time.perf_counter() - started)
+
+
+def run_server(port, scenario, requests, warmup, concurrency, context):
+    """Run a scenario against the WSGI server from concurrent client threads."""
+
+    def send(i):
+        method, path, body, headers = build_request(scenario, i, context)
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers = dict(headers, **{"Content-Type": "application/json"})
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        try:
+            conn.request(method, path, body=payload, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            return response.status
+        finally:
+            conn.close()
+
+    for i in range(warmup):
+        send(i)
+
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def worker():
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            begin = time.perf_counter()
+            try:
+                failed = send(i) >= 400
+            except OSError:
+                failed = True
+            elapsed = time.perf_counter() - begin
+            with lock:
+                latencies.append(elapsed)
+                errors[0] += failed
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(scenario, "server", latencies, errors[0], time.perf_counter() - started)
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    """Request handler that does not log every request."""
+
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def login_tokens(app, emails):
+    """Log in the given users and return their bearer tokens."""
+    client = app.test_client()
+    tokens = []
+    for email in emails:
+        response = client.post(
+            "/auth/api/login", json={"email": email, "password": PASSWORD}
+        )
+        tokens.append(response.get_json()["token"])
+    return tokens
+
+
+def git_commit():
+    """Return the current commit hash, if this is a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_table(results):
+    """Print a short human-readable summary to stderr."""
+    print(
+        f"{'scenario':<12}{'transport':<10}{'req':>7}{'err':>5}{'rps':>10}"
+        f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}",
+        file=sys.stderr,
+    )
+    for result in results:
+        latency = result["latency_ms"]
+        print(
+            f"{result['scenario']:<12}{result['transport']:<10}{result['requests']:>7}"
+            f"{result['errors']:>5}{result['throughput_rps']:>10}"
+            f"{latency['p50']:>10}{latency['p95']:>10}{latency['p99']:>10}",
+            file=sys.stderr,
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the shop HTTP endpoints.")
+    parser.add_argument("--items", type=int, default=2000, help="Catalog size")
+    parser.add_argument("--users", type=int, default=50, help="Number of users")
+    parser.add_argument(
+        "--baskets", type=int, default=25, help="Number of users with a basket"
+    )
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+    parser.add_argument(
+        "--login-requests", type=int, default=20,
+        help="Requests for the login scenario (PBKDF2 makes it slow)",
+    )
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests first")
+    parser.add_argument(
+        "--concurrency", type=int, default=4, help="Client threads against the server"
+    )
+    parser.add_argument(
+        "--scenario", action="append", choices=SCENARIOS,
+        help="Scenario to run (repeatable, default all)",
+    )
+    parser.add_argument(
+        "--transport", action="append", choices=TRANSPORTS,
+        help="Transport to use (repeatable, default both)",
+    )
+    parser.add_argument("--seed", type=int, default=1, help="Random seed of the dataset")
+    parser.add_argument("--output", help="Write the JSON results to this file")
+
+    args = parser.parse_args()
+    scenarios = args.scenario or list(SCENARIOS)
+    transports = args.transport or list(TRANSPORTS)
+
+    db_fd, db_path = tempfile.mkstemp(suffix=".db")
+    app = create_app({"DATABASE": db_path})
+    server = None
+    try:
+        print(f"Seeding {args.items} items, {args.users} users...", file=sys.stderr)
+        emails = seed(app, args.items, args.users, args.baskets, args.seed)
+        context = {
+            "items": args.items,
+            "emails": emails,
+            "tokens": login_tokens(app, emails[:max(args.concurrency, 1)]),
+        }
+
+        if "server" in transports:
+            server = make_server(
+                "127.0.0.1", 0, app, threaded=True, request_handler=QuietRequestHandler
+            )
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        results = []
+        for transport in transports:
+            for scenario in scenarios:
+                requests = args.login_requests if scenario == "login" else args.requests
+                print(f"Running {scenario} via {transport}...", file=sys.stderr)
+                if transport == "client":
+                    result = run_client(app, scenario, requests, args.warmup, context)
+                else:
+                    result = run_server(
+                        server.server_port, scenario, requests, args.warmup,
+                        args.concurrency, context,
+                    )
+                results.append(result)
+    finally:
+        if server is not None:
+            server.shutdown()
+        if get_hashing_pool(app) is not None:
+            get_hashing_pool(app).shutdown()
+        get_pool(app).close_idle()
+        os.close(db_fd)
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(db_path + suffix):
+                os.unlink(db_path + suffix)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "dataset": {
+                "items": args.items,
+                "users": args.users,
+                "baskets": args.baskets,
+                "seed": args.seed,
+            },
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+        },
+        "results": results,
+    }
+
+    print_table(results)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+        print(f"Results written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -15,7 +15,7 @@ def main():
     parser.add_argument(
         "--service",
         type=str,
-        choices=["user", "item", "basket", "token", "equivalence", "boundary", "assert", "all"],
+        choices=["user", "item", "basket", "writer", "token", "auth", "hashing", "instrumentation", "metrics", "db", "cache", "compression", "generator", "fragments", "models", "equivalence", "boundary", "assert", "all"],
         default="all",
         help="Specific service or testing technique to test",
     )
@@ -43,8 +43,30 @@ def main():
         cmd.append("tests/unit/test_item_service.py")
     elif args.service == "basket":
         cmd.append("tests/unit/test_basket_service.py")
+    elif args.service == "writer":
+        cmd.append("tests/unit/test_basket_writer.py")
     elif args.service == "token":
         cmd.append("tests/unit/test_token_service.py")
+    elif args.service == "auth":
+        cmd.append("tests/unit/test_auth_decorator.py")
+    elif args.service == "hashing":
+        cmd.append("tests/unit/test_hashing_service.py")
+    elif args.service == "instrumentation":
+        cmd.append("tests/unit/test_instrumentation.py")
+    elif args.service == "metrics":
+        cmd.append("tests/unit/test_metrics.py")
+    elif args.service == "db":
+        cmd.append("tests/unit/test_db.py")
+    elif args.service == "cache":
+        cmd.append("tests/unit/test_cache.py")
+    elif args.service == "compression":
+        cmd.append("tests/unit/test_compression.py")
+    elif args.service == "generator":
+        cmd.append("tests/unit/test_data_generator.py")
+    elif args.service == "fragments":
+        cmd.append("tests/unit/test_fragment_cache.py")
+    elif args.service == "models":
+        cmd.append("tests/unit/test_models.py")
     elif args.service == "equivalence":
         cmd.append("tests/unit/test_equivalence_partitioning.py")
     elif args.service == "boundary":
@@ -2,7 +2,8 @@ import os
 import tempfile
 import pytest
 from app import create_app
-from app.db import get_db, init_db
+from app.db import get_db, get_pool, init_db
+from app.services.hashing_service import get_hashing_pool
 from app.services.user_service import register_user, authenticate_user
 from app.services.item_service import add_item
 
@@ -28,7 +29,10 @@ def app():
 
     yield app
 
-    # Close and remove the temporary database
+    # Stop worker threads, close pooled connections and remove the temporary database
+    if get_hashing_pool(app) is not None:
+        get_hashing_pool(app).shutdown()
+    get_pool(app).close_idle()
     os.close(db_fd)
     os.unlink(db_path)
 
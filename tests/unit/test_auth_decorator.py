@@ -0,0 +1,72 @@
+import pytest
+from app.services.cache import get_cache
+from app.services.token_service import generate_token
+from app.services.user_service import get_cached_user, invalidate_cached_user
+
+# Mark all tests in this file as unit tests
+pytestmark = pytest.mark.unit
+
+
+def _bearer(app, user_id):
+    with app.app_context():
+        return {"Authorization": f"Bearer {generate_token(user_id)}"}
+
+
+class TestLoginRequired:
+    """Unit tests for the login_required decorator and user cache."""
+
+    def test_session_user_served_from_cache(self, app, auth_client):
+        """Test that repeated session requests reuse the cached user."""
+        auth_client.get("/profile")
+        with app.app_context():
+            hits_before = get_cache("users").stats()["hits"]
+
+        response = auth_client.get("/profile")
+
+        assert response.status_code == 200
+        with app.app_context():
+            assert get_cache("users").stats()["hits"] == hits_before + 1
+
+    def test_token_authentication(self, app, client, test_user):
+        """Test that a valid bearer token authenticates API requests."""
+        response = client.get("/shop/api/basket", headers=_bearer(app, test_user["id"]))
+
+        assert response.status_code == 200
+
+    def test_token_for_unknown_user_rejected(self, app, client):
+        """Test that a token for a user that does not exist is refused."""
+        response = client.get("/shop/api/basket", headers=_bearer(app, 9999))
+
+        assert response.status_code == 401
+        assert response.json["message"] == "User not found"
+
+    def test_trusted_claims_skip_user_lookup(self, app, client, test_user):
+        """Test that trusted JWT claims identify the user on GET requests."""
+        app.config["AUTH_TRUST_JWT_CLAIMS"] = True
+
+        response = client.get("/shop/api/basket", headers=_bearer(app, test_user["id"]))
+
+        assert response.status_code == 200
+        with app.app_context():
+            assert get_cache("users").stats()["misses"] == 0
+
+    def test_invalidated_user_is_reloaded(self, app, test_user):
+        """Test that invalidating a user drops the cached entry."""
+        with app.app_context():
+            first = get_cached_user(test_user["id"])
+            assert get_cached_user(test_user["id"]) is first
+
+            invalidate_cached_user(test_user["id"])
+
+            reloaded = get_cached_user(test_user["id"])
+            assert reloaded is not first
+            assert reloaded["email"] == test_user["email"]
+
+    def test_trusted_claims_not_used_for_pages(self, app, client, test_user):
+        """Test that views needing the full user still load it with trusted claims."""
+        app.config["AUTH_TRUST_JWT_CLAIMS"] = True
+
+        response = client.get("/profile", headers=_bearer(app, test_user["id"]))
+
+        assert response.status_code == 200
+        assert test_user["email"].encode() in response.data
@@ -1,8 +1,11 @@
 import pytest
 from app.services.basket_service import (
     add_to_basket, get_basket_items, update_basket_quantity,
-    remove_from_basket, clear_basket, get_basket_total
+    remove_from_basket, clear_basket, get_basket_total,
+    apply_basket_operations, get_basket_snapshot, get_basket_summary
 )
+from app.db import get_db
+from app.services.item_service import update_item, delete_item
 
 # Mark all tests in this file as unit tests
 pytestmark = pytest.mark.unit
@@ -140,3 +143,193 @@ class TestBasketService:
             # Verify basket is empty
             basket_after = get_basket_items(test_user['id'])
             assert len(basket_after) == 0
+    
+    def test_add_existing_item_increments_quantity(self, app, test_user, test_items):
+        """Test that adding an item twice keeps one basket line."""
+        with app.app_context():
+            add_to_basket(test_user['id'], test_items[0]['id'], 2)
+            add_to_basket(test_user['id'], test_items[0]['id'], 3)
+            
+            lines = [item for item in get_basket_items(test_user['id'])
+                     if item['item_id'] == test_items[0]['id']]
+            
+            assert len(lines) == 1
+            assert lines[0]['quantity'] == 5
+    
+    def test_add_nonexistent_item(self, app, test_user):
+        """Test that adding an unknown item fails without touching the basket."""
+        with app.app_context():
+            result = add_to_basket(test_user['id'], 9999, 1)
+            
+            assert result['success'] is False
+            assert result['message'] == 'Item not found'
+            assert get_basket_items(test_user['id']) == []
+
+    
+    def test_apply_basket_operations(self, app, test_user, test_items):
+        """Test applying add, update and remove operations in one batch."""
+        with app.app_context():
+            add_to_basket(test_user['id'], test_items[2]['id'], 1)
+            
+            result = apply_basket_operations(test_user['id'], [
+                {'op': 'add', 'item_id': test_items[0]['id'], 'quantity': 2},
+                {'op': 'add', 'item_id': test_items[0]['id'], 'quantity': 1},
+                {'op': 'update', 'item_id': test_items[1]['id'], 'quantity': 4},
+                {'op': 'remove', 'item_id': test_items[2]['id']},
+            ])
+            
+            assert result['success'] is True
+            assert [line['success'] for line in result['results']] == [True] * 4
+            
+            quantities = {item['item_id']: item['quantity']
+                          for item in get_basket_items(test_user['id'])}
+            assert quantities == {test_items[0]['id']: 3, test_items[1]['id']: 4}
+    
+    def test_apply_basket_operations_reports_bad_lines(self, app, test_user, test_items):
+        """Test that invalid lines fail individually while the rest apply."""
+        with app.app_context():
+            result = apply_basket_operations(test_user['id'], [
+                {'op': 'add', 'item_id': test_items[0]['id'], 'quantity': 1},
+                {'op': 'add', 'item_id': 9999, 'quantity': 1},
+                {'op': 'explode', 'item_id': test_items[0]['id']},
+                {'op': 'add', 'item_id': test_items[1]['id'], 'quantity': 'two'},
+            ])
+            
+            assert result['success'] is False
+            assert [line['success'] for line in result['results']] == [True, False, False, False]
+            assert result['results'][1]['message'] == 'Item not found'
+            assert [item['item_id'] for item in get_basket_items(test_user['id'])] == [test_items[0]['id']]
+    
+    def test_apply_basket_operations_rejects_out_of_range_values(self, auth_client, test_items):
+        """Test that oversized integers fail per operation instead of failing the batch."""
+        response = auth_client.post('/shop/api/basket/batch', json={'operations': [
+            {'op': 'add', 'item_id': test_items[0]['id'], 'quantity': 10 ** 30},
+            {'op': 'remove', 'item_id': 10 ** 30},
+            {'op': 'add', 'item_id': test_items[1]['id'], 'quantity': 1},
+        ]})
+
+        assert response.status_code == 200
+        assert [line['success'] for line in response.json['results']] == [False, False, True]
+        assert response.json['results'][1]['message'] == 'item_id is out of range'
+
+    def test_apply_basket_operations_keeps_order(self, app, test_user, test_items):
+        """Test that operations on the same item apply in request order."""
+        with app.app_context():
+            apply_basket_operations(test_user['id'], [
+                {'op': 'add', 'item_id': test_items[0]['id'], 'quantity': 2},
+                {'op': 'remove', 'item_id': test_items[0]['id']},
+                {'op': 'add', 'item_id': test_items[0]['id'], 'quantity': 1},
+            ])
+            
+            basket = get_basket_items(test_user['id'])
+            assert [(item['item_id'], item['quantity']) for item in basket] == [(test_items[0]['id'], 1)]
+    
+    def test_basket_batch_endpoint(self, auth_client, test_items):
+        """Test the batch endpoint returns one result per operation."""
+        response = auth_client.post('/shop/api/basket/batch', json={'operations': [
+            {'op': 'add', 'item_id': test_items[0]['id'], 'quantity': 1},
+            {'op': 'add', 'item_id': test_items[1]['id'], 'quantity': 2},
+        ]})
+        
+        assert response.status_code == 200
+        assert response.json['success'] is True
+        assert len(response.json['results']) == 2
+        
+        response = auth_client.post('/shop/api/basket/batch', json={'operations': 'nope'})
+        assert response.status_code == 400
+
+    
+    def test_get_basket_snapshot(self, app, test_user, test_items):
+        """Test that the snapshot matches the separate lines and total queries."""
+        with app.app_context():
+            add_to_basket(test_user['id'], test_items[0]['id'], 2)
+            add_to_basket(test_user['id'], test_items[1]['id'], 1)
+            
+            snapshot = get_basket_snapshot(test_user['id'])
+            
+            lines = get_basket_items(test_user['id'])
+            assert [item['id'] for item in snapshot['basket_items']] == [item['id'] for item in lines]
+            for item in snapshot['basket_items']:
+                assert abs(item['subtotal'] - item['price'] * item['quantity']) < 0.01
+            assert abs(snapshot['total'] - get_basket_total(test_user['id'])) < 0.01
+    
+    def test_get_empty_basket_snapshot(self, app, test_user):
+        """Test the snapshot of an empty basket."""
+        with app.app_context():
+            assert get_basket_snapshot(test_user['id']) == {'basket_items': [], 'total': 0.0}
+
+    
+    def _recomputed_summary(self, user_id):
+        """Compute the summary from scratch for comparison."""
+        lines = get_basket_items(user_id)
+        return (sum(item['quantity'] for item in lines),
+                sum(item['price'] * item['quantity'] for item in lines))
+    
+    def test_basket_summary_maintained_incrementally(self, app, test_user, test_items):
+        """Test that the stored summary follows every kind of basket change."""
+        with app.app_context():
+            user_id = test_user['id']
+            assert get_basket_summary(user_id) == {'item_count': 0, 'total': 0.0}
+            
+            add_to_basket(user_id, test_items[0]['id'], 2)
+            add_to_basket(user_id, test_items[1]['id'], 1)
+            add_to_basket(user_id, test_items[0]['id'], 1)
+            line_id = get_basket_items(user_id)[1]['id']
+            update_basket_quantity(line_id, 4)
+            apply_basket_operations(user_id, [{'op': 'add', 'item_id': test_items[2]['id'], 'quantity': 1}])
+            remove_from_basket(get_basket_items(user_id)[0]['id'])
+            
+            summary = get_basket_summary(user_id)
+            item_count, total = self._recomputed_summary(user_id)
+            assert summary['item_count'] == item_count == 5
+            assert abs(summary['total'] - total) < 0.01
+            
+            clear_basket(user_id)
+            assert get_basket_summary(user_id) == {'item_count': 0, 'total': 0.0}
+    
+    def test_basket_summary_follows_item_changes(self, app, test_user, test_items):
+        """Test that price changes and deleted items refresh the summary."""
+        with app.app_context():
+            user_id = test_user['id']
+            add_to_basket(user_id, test_items[0]['id'], 2)
+            add_to_basket(user_id, test_items[1]['id'], 1)
+            get_basket_summary(user_id)
+            
+            item = test_items[0]
+            update_item(item['id'], item['name'], item['description'], 1.0, item['image_url'])
+            summary = get_basket_summary(user_id)
+            assert abs(summary['total'] - (2.0 + test_items[1]['price'])) < 0.01
+            
+            delete_item(test_items[1]['id'])
+            assert get_basket_summary(user_id) == {'item_count': 2, 'total': 2.0}
+    
+    def test_basket_summary_leaves_open_transaction_alone(self, app, test_user, test_items):
+        """Test that reading a missing summary does not commit the caller's work."""
+        with app.app_context():
+            db = get_db()
+            db.execute('DELETE FROM basket_summary')
+            db.commit()
+            db.execute(
+                'INSERT INTO basket_items (user_id, item_id, quantity) VALUES (?, ?, 2)',
+                (test_user['id'], test_items[0]['id'])
+            )
+            
+            summary = get_basket_summary(test_user['id'])
+            
+            assert db.in_transaction
+            assert summary['item_count'] == 2
+            db.rollback()
+            assert get_basket_summary(test_user['id']) == {'item_count': 0, 'total': 0.0}
+    
+    def test_basket_summary_total_rounded_to_cents(self, app, test_user, test_items):
+        """Test that incremental float error does not leak into the total."""
+        with app.app_context():
+            user_id = test_user['id']
+            get_basket_summary(user_id)
+            for _ in range(50):
+                for item in test_items:
+                    add_to_basket(user_id, item['id'], 1)
+            remove_from_basket(get_basket_items(user_id)[0]['id'])
+            
+            expected = round(50 * (test_items[1]['price'] + test_items[2]['price']), 2)
+            assert get_basket_total(user_id) == expected
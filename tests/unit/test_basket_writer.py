@@ -0,0 +1,90 @@
+import pytest
+from app.services import basket_writer
+from app.services.basket_writer import BasketWriteBehind, get_basket_writer
+from app.services.basket_service import (
+    add_to_basket, get_basket_items, update_basket_quantity,
+    remove_from_basket, clear_basket, get_basket_total
+)
+
+# Mark all tests in this file as unit tests
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def write_behind_app(app):
+    """The test app with basket write-behind enabled."""
+    app.config["BASKET_WRITE_BEHIND"] = True
+    basket_writer.init_app(app)
+    yield app
+    app.extensions.pop("basket_writer").stop()
+
+
+class TestBasketWriteBehind:
+    """Unit tests for the basket write-behind queue."""
+
+    def test_mutations_are_queued_and_visible_to_reads(self, write_behind_app, test_user, test_items):
+        """Test that queued writes are committed before the user's next read."""
+        with write_behind_app.app_context():
+            user_id = test_user["id"]
+            assert add_to_basket(user_id, test_items[0]["id"], 2)["success"] is True
+            add_to_basket(user_id, test_items[1]["id"], 1)
+            add_to_basket(user_id, test_items[0]["id"], 1)
+
+            basket = get_basket_items(user_id)
+            assert {item["item_id"]: item["quantity"] for item in basket} == {
+                test_items[0]["id"]: 3,
+                test_items[1]["id"]: 1,
+            }
+
+            update_basket_quantity(basket[0]["id"], 5)
+            remove_from_basket(basket[1]["id"])
+            assert abs(get_basket_total(user_id) - test_items[0]["price"] * 5) < 0.01
+
+            clear_basket(user_id)
+            assert get_basket_items(user_id) == []
+
+            assert get_basket_writer().stats()["committed"] == 6
+
+    def test_unknown_item_rejected_before_queueing(self, write_behind_app, test_user):
+        """Test that adding a missing item fails synchronously."""
+        with write_behind_app.app_context():
+            result = add_to_basket(test_user["id"], 9999, 1)
+
+            assert result["success"] is False
+            assert get_basket_writer().stats()["queued"] == 0
+
+    def test_full_queue_falls_back_to_synchronous_write(self, app, test_user, test_items):
+        """Test that mutations are written directly when the queue is full."""
+        with app.app_context():
+            writer = BasketWriteBehind(lambda: None, max_queue=1)
+            app.extensions["basket_writer"] = writer
+            # Occupy the only queue slot without a running writer thread
+            writer._thread = object()
+            writer._queue.put_nowait((0, "clear", (0,)))
+            try:
+                result = add_to_basket(test_user["id"], test_items[0]["id"], 1)
+            finally:
+                app.extensions.pop("basket_writer")
+
+            assert result["success"] is True
+            assert writer.stats()["fallbacks"] == 1
+            assert len(get_basket_items(test_user["id"])) == 1
+
+    def test_stop_flushes_queue(self, write_behind_app, test_user, test_items):
+        """Test that stopping the writer commits everything still queued."""
+        with write_behind_app.app_context():
+            add_to_basket(test_user["id"], test_items[0]["id"], 1)
+            get_basket_writer().stop()
+
+            stats = get_basket_writer().stats()
+            assert stats["pending"] == 0
+            assert stats["committed"] == 1
+
+    def test_committed_users_are_forgotten(self, write_behind_app, test_user, test_items):
+        """Test that users who never read again leave no pending entry behind."""
+        with write_behind_app.app_context():
+            add_to_basket(test_user["id"], test_items[0]["id"], 1)
+            writer = get_basket_writer()
+
+            assert writer.flush(timeout=5)
+            assert writer._pending == {}
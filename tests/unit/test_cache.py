@@ -0,0 +1,86 @@
+import pytest
+from app.services.cache import TTLCache
+
+# Mark all tests in this file as unit tests
+pytestmark = pytest.mark.unit
+
+
+class FakeClock:
+    """Manually advanced clock for expiry tests."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache:
+    """Unit tests for the TTL/LRU cache."""
+
+    def test_get_and_set(self):
+        """Test storing and retrieving a value."""
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set("key", "value")
+
+        assert cache.get("key") == "value"
+        assert cache.get("missing") is None
+        assert cache.get("missing", "default") == "default"
+
+    def test_entries_expire_after_ttl(self):
+        """Test that entries are dropped once their TTL has passed."""
+        clock = FakeClock()
+        cache = TTLCache(maxsize=10, ttl=60, clock=clock)
+        cache.set("key", "value")
+        cache.set("short", "value", ttl=5)
+
+        clock.now += 10
+        assert cache.get("short") is None
+        assert cache.get("key") == "value"
+
+        clock.now += 60
+        assert cache.get("key") is None
+        assert cache.stats()["expired"] == 2
+
+    def test_least_recently_used_entry_is_evicted(self):
+        """Test that the size bound evicts the least recently used entry."""
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")  # "b" is now the least recently used
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+        assert cache.stats()["evictions"] == 1
+
+    def test_hit_and_miss_counters(self):
+        """Test the hit/miss statistics."""
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set("key", "value")
+        cache.get("key")
+        cache.get("key")
+        cache.get("other")
+
+        stats = cache.stats()
+        assert stats["hits"] == 2
+        assert stats["misses"] == 1
+        assert stats["size"] == 1
+
+    def test_stale_generation_is_not_stored(self):
+        """Test that a value loaded before a clear() is discarded."""
+        cache = TTLCache(maxsize=10, ttl=60)
+        generation = cache.generation
+        cache.clear()
+        cache.set("key", "stale", generation=generation)
+
+        assert cache.get("key") is None
+
+    def test_zero_size_disables_cache(self):
+        """Test that a cache with maxsize 0 never stores anything."""
+        cache = TTLCache(maxsize=0, ttl=60)
+        cache.set("key", "value")
+
+        assert cache.get("key") is None
+        assert len(cache) == 0
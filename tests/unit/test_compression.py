@@ -0,0 +1,79 @@
+import gzip
+import zlib
+import pytest
+from app.services.cache import get_cache
+
+# Mark all tests in this file as unit tests
+pytestmark = pytest.mark.unit
+
+
+class TestCompression:
+    """Unit tests for response compression."""
+
+    def test_json_gzip_compressed(self, auth_client, test_items):
+        """Test that a large JSON response is gzip-compressed."""
+        plain = auth_client.get("/shop/api/items")
+        response = auth_client.get(
+            "/shop/api/items", headers={"Accept-Encoding": "gzip, deflate"}
+        )
+
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["Vary"]
+        assert gzip.decompress(response.get_data()) == plain.get_data()
+        assert int(response.headers["Content-Length"]) < len(plain.get_data())
+
+    def test_deflate_when_gzip_not_accepted(self, auth_client, test_items):
+        """Test that deflate is used when it is the only accepted encoding."""
+        plain = auth_client.get("/shop/items")
+        response = auth_client.get("/shop/items", headers={"Accept-Encoding": "deflate"})
+
+        assert response.headers["Content-Encoding"] == "deflate"
+        assert zlib.decompress(response.get_data()) == plain.get_data()
+
+    def test_uncompressed_without_accept_encoding(self, auth_client, test_items):
+        """Test that clients not asking for compression get the identity body."""
+        response = auth_client.get("/shop/api/items")
+
+        assert "Content-Encoding" not in response.headers
+        assert "Accept-Encoding" in response.headers["Vary"]
+
+    def test_small_responses_not_compressed(self, app, auth_client, test_items):
+        """Test that bodies under COMPRESSION_MIN_SIZE are sent as they are."""
+        app.config["COMPRESSION_MIN_SIZE"] = 10**6
+
+        response = auth_client.get("/shop/api/items", headers={"Accept-Encoding": "gzip"})
+
+        assert "Content-Encoding" not in response.headers
+
+    def test_streamed_responses_not_compressed(self, auth_client, test_items):
+        """Test that streamed exports are left alone."""
+        response = auth_client.get(
+            "/shop/api/items?format=ndjson", headers={"Accept-Encoding": "gzip"}
+        )
+
+        assert "Content-Encoding" not in response.headers
+
+    def test_compressed_catalog_body_cached(self, app, auth_client, test_items):
+        """Test that ETag-tagged responses reuse the compressed body."""
+        headers = {"Accept-Encoding": "gzip"}
+        first = auth_client.get("/shop/api/items", headers=headers)
+        with app.app_context():
+            hits = get_cache("compressed").stats()["hits"]
+
+        second = auth_client.get("/shop/api/items", headers=headers)
+
+        assert second.get_data() == first.get_data()
+        assert first.headers["ETag"].startswith('W/"')
+        with app.app_context():
+            assert get_cache("compressed").stats()["hits"] == hits + 1
+
+    def test_weak_etag_revalidates(self, auth_client, test_items):
+        """Test that the weak ETag of a compressed response still yields 304."""
+        headers = {"Accept-Encoding": "gzip"}
+        etag = auth_client.get("/shop/api/items", headers=headers).headers["ETag"]
+
+        response = auth_client.get(
+            "/shop/api/items", headers=dict(headers, **{"If-None-Match": etag})
+        )
+
+        assert response.status_code == 304
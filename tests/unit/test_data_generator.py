@@ -0,0 +1,83 @@
+import pytest
+from app.db import get_db
+from app.services.data_generator import DEFAULT_PASSWORD, generate_data
+from app.services.item_service import get_all_items, search_items
+from app.services.user_service import authenticate_user
+
+# Mark all tests in this file as unit tests
+pytestmark = pytest.mark.unit
+
+
+class TestDataGenerator:
+    """Unit tests for the synthetic data generator."""
+
+    def _count(self, table):
+        return get_db().execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def test_generates_requested_rows(self, app):
+        """Test that the requested numbers of items, users and baskets are created."""
+        with app.app_context():
+            items, users = self._count("items"), self._count("users")
+
+            result = generate_data(items=50, users=20, baskets=10, seed=1, batch_size=7)
+
+            assert result["success"]
+            assert result["items"] == 50
+            assert result["users"] == 20
+            assert self._count("items") == items + 50
+            assert self._count("users") == users + 20
+            owners = get_db().execute(
+                "SELECT COUNT(DISTINCT user_id) FROM basket_items"
+            ).fetchone()[0]
+            assert owners == 10
+
+    def test_same_seed_same_data(self, app):
+        """Test that a seed makes the generated catalog reproducible."""
+        with app.app_context():
+            generate_data(items=20, seed=42)
+            first = [dict(row) for row in get_db().execute(
+                "SELECT name, description, price FROM items ORDER BY id DESC LIMIT 20"
+            )]
+
+            generate_data(items=20, seed=42)
+            second = [dict(row) for row in get_db().execute(
+                "SELECT name, description, price FROM items ORDER BY id DESC LIMIT 20"
+            )]
+
+            # Names carry the row number; the rest repeats exactly
+            assert [row["price"] for row in first] == [row["price"] for row in second]
+            assert [row["description"] for row in first] == [row["description"] for row in second]
+
+    def test_generated_items_searchable(self, app):
+        """Test that bulk-inserted items are indexed and the FTS trigger is restored."""
+        with app.app_context():
+            get_all_items()
+            generate_data(items=30, seed=3)
+
+            assert len(get_all_items()) == self._count("items")
+            last = get_db().execute("SELECT id, name FROM items ORDER BY id DESC").fetchone()
+            assert last["id"] in [item["id"] for item in search_items(last["name"])]
+
+            trigger = get_db().execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'items_fts_after_insert'"
+            ).fetchone()
+            assert trigger is not None
+
+    def test_generated_users_can_log_in(self, app):
+        """Test that generated users share the given password."""
+        with app.app_context():
+            generate_data(users=3, seed=1)
+            email = get_db().execute(
+                "SELECT email FROM users ORDER BY id DESC LIMIT 1"
+            ).fetchone()["email"]
+
+            assert authenticate_user(email, DEFAULT_PASSWORD)["success"]
+
+    def test_generate_data_command(self, runner):
+        """Test the generate-data CLI command with sizes."""
+        result = runner.invoke(
+            args=["generate-data", "--items", "10", "--users", "5", "--baskets", "5", "--seed", "1"]
+        )
+
+        assert result.exit_code == 0
+        assert "Generated 10 items, 5 users" in result.output
@@ -0,0 +1,239 @@
+import os
+import sqlite3
+import threading
+import pytest
+from app import create_app
+from app.db import get_db, get_db_profile, get_pool, get_pool_stats, SchemaOutdatedError
+from app.db.migrate import get_migrations, get_schema_version, migrate_db
+from app.services.item_service import get_all_items
+
+# Mark all tests in this file as unit tests
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def baseline_app(tmp_path):
+    """Create an app on a database made by the baseline schema (version 0)."""
+    app = create_app({"TESTING": True, "DATABASE": str(tmp_path / "shop.db")})
+    with app.open_resource("db/schema.sql") as f:
+        schema = f.read().decode("utf8")
+
+    conn = sqlite3.connect(app.config["DATABASE"])
+    conn.executescript(schema)
+    conn.execute(
+        "INSERT INTO items (name, description, price) VALUES ('Lamp', 'Desk lamp', 20.0)"
+    )
+    conn.commit()
+    conn.close()
+
+    yield app
+    get_pool(app).close_idle()
+
+
+class TestConnectionPool:
+    """Unit tests for the pooled database connections."""
+
+    def test_connection_reused_across_app_contexts(self, app):
+        """Test that a released connection is handed out again."""
+        with app.app_context():
+            first = get_db()
+
+        with app.app_context():
+            second = get_db()
+            stats = get_pool_stats()
+
+        assert first is second
+        assert stats['reused'] >= 1
+        assert stats['in_use'] == 1
+
+    def test_get_db_returns_same_connection_within_context(self, app):
+        """Test that get_db is stable inside one app context."""
+        with app.app_context():
+            assert get_db() is get_db()
+            assert get_pool_stats()['in_use'] == 1
+
+    def test_unhealthy_connection_is_discarded(self, app):
+        """Test that a broken idle connection is replaced on checkout."""
+        get_pool(app).health_check_idle = 0
+        with app.app_context():
+            broken = get_db()
+            broken.close()
+
+        with app.app_context():
+            db = get_db()
+            stats = get_pool_stats()
+            assert db is not broken
+            assert db.execute('SELECT 1').fetchone()[0] == 1
+
+        assert stats['discarded'] == 1
+
+    def test_recently_released_connection_not_pinged(self, app):
+        """Test that connections idle for less than the threshold skip the health check."""
+        pool = get_pool(app)
+        conn = pool.acquire()
+        pool.release(conn)
+        conn.close()
+
+        # A ping would have discarded the closed connection
+        assert pool.acquire() is conn
+        assert pool.stats()['discarded'] == 0
+        pool.release(conn)
+
+    def test_connections_beyond_pool_size_are_closed(self, app):
+        """Test that overflow connections are not kept open."""
+        with app.app_context():
+            pool = get_pool()
+            held = [pool.acquire() for _ in range(pool.size + 2)]
+            assert pool.stats()['open'] == pool.size + 2
+
+            for conn in held:
+                pool.release(conn)
+
+            stats = pool.stats()
+            assert stats['open'] == pool.size
+            assert stats['idle'] == pool.size
+
+    def test_connections_reused_across_threads(self, app):
+        """Test that short-lived threads share the idle connections."""
+        pool = get_pool(app)
+        pool.close_idle()
+        errors = []
+
+        def handle_request():
+            try:
+                with app.app_context():
+                    get_db().execute("SELECT COUNT(*) FROM items").fetchone()
+            except Exception as e:
+                errors.append(e)
+
+        for _ in range(10):
+            thread = threading.Thread(target=handle_request)
+            thread.start()
+            thread.join()
+
+        stats = pool.stats()
+        assert errors == []
+        assert stats['reused'] > 0
+        assert stats['open'] <= pool.size
+
+    def test_uncommitted_changes_rolled_back_on_release(self, app):
+        """Test that an open transaction does not leak into the next request."""
+        with app.app_context():
+            db = get_db()
+            db.execute("DELETE FROM items")
+            assert db.in_transaction
+
+        with app.app_context():
+            db = get_db()
+            assert not db.in_transaction
+            count = db.execute("SELECT COUNT(*) AS count FROM items").fetchone()
+            assert count['count'] > 0
+
+
+class TestDatabaseProfile:
+    """Unit tests for the SQLite connection profile."""
+
+    def test_database_config_is_used(self, app):
+        """Test that connections open the configured DATABASE file."""
+        with app.app_context():
+            db = get_db()
+            database = db.execute("PRAGMA database_list").fetchone()["file"]
+            assert os.path.samefile(database, app.config["DATABASE"])
+
+    def test_pragmas_applied_on_connect(self, app):
+        """Test that the configured PRAGMAs are set on new connections."""
+        with app.app_context():
+            db = get_db()
+            assert db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            assert db.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+            assert db.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+            assert db.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+            assert (
+                db.execute("PRAGMA cache_size").fetchone()[0]
+                == app.config["DB_CACHE_SIZE"]
+            )
+
+    def test_profile_skips_unset_values(self):
+        """Test that settings configured as None are left at SQLite defaults."""
+        profile = get_db_profile({"DB_JOURNAL_MODE": "WAL", "DB_MMAP_SIZE": None})
+        assert profile == {"journal_mode": "WAL"}
+
+    def test_profile_rejects_invalid_values(self):
+        """Test that malformed PRAGMA values are refused."""
+        with pytest.raises(ValueError):
+            get_db_profile({"DB_JOURNAL_MODE": "WAL; DROP TABLE users"})
+
+
+class TestMigrations:
+    """Unit tests for the schema migration runner."""
+
+    def _indexes(self, db, table):
+        rows = db.execute(f"PRAGMA index_list({table})").fetchall()
+        return {row["name"]: row["unique"] for row in rows}
+
+    def test_init_db_applies_all_migrations(self, app):
+        """Test that a fresh database is created at the latest version."""
+        with app.app_context():
+            latest = get_migrations()[-1][0]
+            db = get_db()
+
+            assert get_schema_version() == latest
+            assert self._indexes(db, "basket_items")["idx_basket_items_user_item"] == 1
+            assert "idx_items_name" in self._indexes(db, "items")
+
+    def test_migrate_upgrades_in_place(self, app):
+        """Test that migrating an old schema keeps and merges existing data."""
+        with app.app_context():
+            db = get_db()
+            with app.open_resource("db/schema.sql") as f:
+                db.executescript(f.read().decode("utf8"))
+
+            db.execute(
+                "INSERT INTO users (id, first_name, last_name, email, password, date_of_birth) "
+                "VALUES (1, 'Old', 'User', 'old@example.com', 'x$y', '01/01/1990')"
+            )
+            db.execute(
+                "INSERT INTO items (id, name, description, price) "
+                "VALUES (1, 'Lamp', 'Desk lamp', 20.0)"
+            )
+            # Duplicate rows for the same user/item pair, allowed before 0001
+            db.executemany(
+                "INSERT INTO basket_items (user_id, item_id, quantity) VALUES (1, 1, ?)",
+                [(2,), (3,)],
+            )
+            db.commit()
+            assert get_schema_version() == 0
+
+            applied = migrate_db()
+
+            assert applied == [filename for _, filename in get_migrations()]
+            rows = db.execute("SELECT * FROM basket_items").fetchall()
+            assert len(rows) == 1
+            assert rows[0]["quantity"] == 5
+            assert db.execute("SELECT name FROM items").fetchone()["name"] == "Lamp"
+
+            # Running again is a no-op
+            assert migrate_db() == []
+
+    def test_migrate_db_command(self, runner):
+        """Test the migrate-db CLI command."""
+        result = runner.invoke(args=["migrate-db"])
+
+        assert result.exit_code == 0
+        assert "Database schema is at version" in result.output
+
+    def test_outdated_database_migrated_on_first_use(self, baseline_app):
+        """Test that a database from an older version is upgraded instead of failing requests."""
+        with baseline_app.app_context():
+            items = get_all_items()
+
+            assert [item["name"] for item in items] == ["Lamp"]
+            assert get_schema_version() == get_migrations()[-1][0]
+
+    def test_outdated_database_refused_without_auto_migrate(self, baseline_app):
+        """Test that DB_AUTO_MIGRATE=False asks for migrate-db instead of running queries."""
+        baseline_app.config["DB_AUTO_MIGRATE"] = False
+
+        with baseline_app.app_context():
+            with pytest.raises(SchemaOutdatedError, match="migrate-db"):
+                get_db()
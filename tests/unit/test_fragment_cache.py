@@ -0,0 +1,54 @@
+import pytest
+from app.services.fragment_cache import get_fragment_cache_stats
+from app.services.item_service import get_item_cache_stats, update_item
+
+# Mark all tests in this file as unit tests
+pytestmark = pytest.mark.unit
+
+
+class TestFragmentCache:
+    """Unit tests for the cached catalog fragments."""
+
+    def _stats(self, app):
+        with app.app_context():
+            return get_fragment_cache_stats(), get_item_cache_stats()
+
+    def test_items_page_served_from_cache(self, auth_client, app, test_items):
+        """Test that a repeated page view skips the query and the rendering."""
+        first = auth_client.get("/shop/items")
+        fragments, items = self._stats(app)
+
+        second = auth_client.get("/shop/items")
+        fragments_after, items_after = self._stats(app)
+
+        assert second.status_code == 200
+        assert second.get_data() == first.get_data()
+        assert fragments_after["hits"] == fragments["hits"] + 1
+        assert items_after["misses"] == items["misses"]
+        assert items_after["hits"] == items["hits"]
+
+    def test_catalog_write_renders_again(self, auth_client, app, test_items):
+        """Test that an item update shows up on the next page view."""
+        auth_client.get("/home")
+
+        with app.app_context():
+            update_item(test_items[0]["id"], "Renamed Lamp", "Description", 1.0)
+
+        response = auth_client.get("/home")
+
+        assert b"Renamed Lamp" in response.get_data()
+
+    def test_pages_and_queries_cached_separately(self, auth_client, test_items):
+        """Test that different queries do not share a fragment."""
+        first = auth_client.get("/shop/search?query=Item 1").get_data(as_text=True)
+        second = auth_client.get("/shop/search?query=Item 2").get_data(as_text=True)
+
+        assert 'value="Item 1"' in first
+        assert 'value="Item 2"' in second
+        assert first != second
+
+    def test_invalid_cursor_redirects(self, auth_client):
+        """Test that a malformed cursor is still rejected."""
+        response = auth_client.get("/shop/items?cursor=not-a-cursor")
+
+        assert response.status_code == 302
@@ -0,0 +1,70 @@
+import threading
+import pytest
+from app.services.hashing_service import HashingPool, HashingBusyError, run_hash
+from app.services.user_service import authenticate_user
+
+# Mark all tests in this file as unit tests
+pytestmark = pytest.mark.unit
+
+
+def _occupy(pool):
+    """Block the pool's only slot until the returned event is set."""
+    started = threading.Event()
+    release = threading.Event()
+
+    def wait():
+        started.set()
+        release.wait(5)
+
+    worker = threading.Thread(target=pool.run, args=(wait,))
+    worker.start()
+    started.wait(5)
+    return release, worker
+
+
+class TestHashingPool:
+    """Unit tests for the password hashing pool."""
+
+    def test_run_returns_result_from_worker_thread(self):
+        """Test that work runs on a pool thread and returns its result."""
+        pool = HashingPool(workers=2, max_pending=2)
+
+        name = pool.run(lambda: threading.current_thread().name)
+
+        assert name.startswith("password-hash")
+        assert pool.stats()["completed"] == 1
+        pool.shutdown()
+
+    def test_full_queue_rejects_work(self):
+        """Test backpressure once every slot is taken."""
+        pool = HashingPool(workers=1, max_pending=0, queue_timeout=0.01)
+        release, worker = _occupy(pool)
+
+        with pytest.raises(HashingBusyError):
+            pool.run(lambda: None)
+
+        release.set()
+        worker.join()
+        assert pool.stats()["rejected"] == 1
+        assert pool.run(lambda: "ok") == "ok"
+        pool.shutdown()
+
+    def test_run_hash_inline_without_app_context(self):
+        """Test that hashing works outside the app, e.g. in scripts."""
+        assert run_hash(lambda value: value * 2, 21) == 42
+
+    def test_authenticate_reports_busy(self, app, test_user):
+        """Test that login fails softly when the hashing queue is full."""
+        pool = HashingPool(workers=1, max_pending=0, queue_timeout=0.01)
+        app.extensions["hashing_pool"] = pool
+        release, worker = _occupy(pool)
+
+        try:
+            with app.app_context():
+                result = authenticate_user(test_user["email"], test_user["password"])
+        finally:
+            release.set()
+            worker.join()
+
+        assert result["success"] is False
+        assert result["busy"] is True
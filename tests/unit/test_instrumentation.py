@@ -0,0 +1,239 @@
+import time
+import pytest
+from flask import g
+from app import create_app
+from app.db import get_db, get_pool
+from app.services.basket_service import apply_basket_operations
+from app.services.instrumentation import (
+    InstrumentedConnection, RequestTimings, get_request_stats, timed
+)
+from app.services.slow_queries import get_slow_query_log, normalize_sql, parameter_shape
+from app.services.token_service import generate_token
+
+# Mark all tests in this file as unit tests
+pytestmark = pytest.mark.unit
+
+OPS_HEADERS = {"Authorization": "Bearer s3cret"}
+
+
+def _server_timing(response):
+    entries = {}
+    for entry in response.headers["Server-Timing"].split(", "):
+        name, *params = entry.split(";")
+        entries[name] = dict(param.split("=", 1) for param in params)
+    return entries
+
+
+class TestInstrumentation:
+    """Unit tests for request timing and SQL instrumentation."""
+
+    def test_pooled_connections_are_instrumented(self, app):
+        """Test that get_db hands out instrumented connections."""
+        with app.app_context():
+            assert isinstance(get_db(), InstrumentedConnection)
+
+    def test_sql_statements_counted(self, app):
+        """Test that statements and fetches are recorded on the current request."""
+        with app.test_request_context():
+            # Acquire first: the pool's health check is a statement too
+            db = get_db()
+            g.timings = RequestTimings()
+            db.execute("SELECT 1").fetchone()
+            db.cursor().execute("SELECT 2").fetchall()
+            db.executemany("UPDATE items SET price = price WHERE id = ?", [(0,), (-1,)])
+
+            assert g.timings.queries == 3
+            assert g.timings.durations["sql"] > 0
+
+    def test_timed_outside_request_is_ignored(self, app):
+        """Test that timing without a timed request is a no-op."""
+        with timed("jwt"):
+            pass
+        with app.app_context():
+            with timed("jwt"):
+                get_db().execute("SELECT 1")
+
+    def test_server_timing_header(self, client, app, test_user):
+        """Test that API responses report SQL, auth and JWT timings."""
+        with app.app_context():
+            token = generate_token(test_user["id"])
+
+        response = client.get(
+            "/shop/api/basket", headers={"Authorization": f"Bearer {token}"}
+        )
+        timing = _server_timing(response)
+
+        assert float(timing["total"]["dur"]) > 0
+        assert int(timing["sql"]["desc"].strip('"').split()[0]) >= 1
+        assert "auth" in timing
+        assert "jwt" in timing
+
+    def test_render_and_hash_timed(self, client, test_user):
+        """Test that login times hashing and pages time rendering."""
+        response = client.post(
+            "/auth/login",
+            data={"email": test_user["email"], "password": test_user["password"]},
+        )
+        assert "hash" in _server_timing(response)
+
+        response = client.get("/shop/items")
+        assert "render" in _server_timing(response)
+
+    def test_stats_aggregated_per_endpoint(self, auth_client, app, test_items):
+        """Test that the stats endpoint reports per-endpoint averages."""
+        app.config["OPS_TOKEN"] = "s3cret"
+        auth_client.get("/shop/items")
+        auth_client.get("/shop/items")
+
+        response = auth_client.get("/ops/stats", headers=OPS_HEADERS)
+        stats = response.get_json()
+
+        assert response.status_code == 200
+        assert stats["requests"]["shop.items"]["requests"] == 2
+        assert stats["requests"]["shop.items"]["avg_queries"] >= 1
+        assert "db_pool" in stats and "caches" in stats
+        with app.app_context():
+            assert get_request_stats()["shop.items"]["requests"] == 2
+
+    def test_stats_requires_ops_token(self, app, auth_client):
+        """Test that the stats endpoint is off by default and never open to shoppers."""
+        assert auth_client.get("/ops/stats").status_code == 404
+        assert auth_client.get("/ops/slow-queries").status_code == 404
+
+        app.config["OPS_TOKEN"] = "s3cret"
+
+        assert auth_client.get("/ops/stats").status_code == 401
+        assert auth_client.get("/ops/slow-queries").status_code == 401
+
+
+class TestSlowQueryLog:
+    """Unit tests for the slow query log and its query plans."""
+
+    @pytest.fixture
+    def slow_log(self, app):
+        log = get_slow_query_log(app)
+        # Every statement counts as slow
+        log.threshold = 0
+        return log
+
+    def test_normalize_sql(self):
+        """Test that literals, IN lists and whitespace are normalized."""
+        sql = "SELECT *  FROM items\n WHERE id IN (?, ?, ?) AND name = 'x''y' AND price > 10.5"
+
+        assert normalize_sql(sql) == (
+            "SELECT * FROM items WHERE id IN (...) AND name = ? AND price > ?"
+        )
+
+    def test_parameter_shape_keeps_types_only(self):
+        """Test that parameters are described by type, never by value."""
+        assert parameter_shape((1, 2, 3, "secret")) == "int*3, str"
+        assert parameter_shape({"email": "a@b.c"}) == ":email=str"
+        assert parameter_shape(()) == ""
+
+    def test_slow_statements_aggregated_with_plan(self, app, slow_log):
+        """Test that executions aggregate by shape and record their plan."""
+        with app.app_context():
+            db = get_db()
+            db.execute("SELECT * FROM items WHERE id = ?", (1,))
+            db.execute("SELECT * FROM items WHERE id = ?", (2,))
+
+        entry = next(
+            entry for entry in slow_log.snapshot()
+            if entry["sql"] == "SELECT * FROM items WHERE id = ?"
+        )
+        assert entry["count"] == 2
+        assert entry["parameters"] == "int"
+        assert entry["plan"] and entry["full_scans"] == []
+        assert entry["max_ms"] >= entry["avg_ms"] > 0
+
+    def test_full_scan_flagged(self, app, slow_log, test_items):
+        """Test that the LIKE search fallback is reported as a full scan."""
+        with app.app_context():
+            get_db().execute(
+                "SELECT * FROM items WHERE name LIKE ? ESCAPE '\\' ORDER BY name LIMIT ? OFFSET ?",
+                ("%Laptop%", 10, 0),
+            )
+
+        entry = next(entry for entry in slow_log.snapshot() if "LIKE" in entry["sql"])
+        assert any(scan.startswith("SCAN items") for scan in entry["full_scans"])
+
+    def test_fetch_time_counts_towards_threshold(self, app, slow_log):
+        """Test that a scan whose cost is in fetching its rows is logged."""
+        slow_log.threshold = 0.05
+        with app.app_context():
+            db = get_db()
+            # Every produced row takes 5 ms, but execute only steps to the first
+            db.create_function("slow", 1, lambda x: time.sleep(0.005) or x)
+            cursor = db.execute(
+                "WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n WHERE x < ?) "
+                "SELECT slow(x) FROM n",
+                (30,),
+            )
+            assert slow_log.snapshot() == []
+
+            assert len(cursor.fetchall()) == 30
+
+        entry = next(entry for entry in slow_log.snapshot() if "slow(x)" in entry["sql"])
+        assert entry["count"] == 1
+        assert entry["parameters"] == "int"
+        assert entry["max_ms"] >= 100
+
+    def test_unfinished_statement_checked_on_release(self, app, slow_log):
+        """Test that statements whose rows were not all read are checked at teardown."""
+        with app.app_context():
+            get_db().execute("SELECT name FROM items").fetchone()
+            assert not any(entry["sql"] == "SELECT name FROM items" for entry in slow_log.snapshot())
+
+        assert any(entry["sql"] == "SELECT name FROM items" for entry in slow_log.snapshot())
+
+    def test_executemany_explained_with_first_parameters(self, app, slow_log, test_user, test_items):
+        """Test that batch writes get a real plan instead of a binding error."""
+        with app.app_context():
+            apply_basket_operations(test_user["id"], [
+                {"op": "remove", "item_id": item["id"]} for item in test_items
+            ])
+
+        entry = next(
+            entry for entry in slow_log.snapshot()
+            if entry["sql"].startswith("DELETE FROM basket_items")
+        )
+        assert entry["parameters"] == "executemany: int*2"
+        assert any("USING" in line and "INDEX" in line for line in entry["plan"])
+
+    def test_entries_bounded(self, app, slow_log):
+        """Test that new shapes beyond the size limit are only counted."""
+        slow_log.clear()
+        slow_log.max_entries = 1
+        with app.app_context():
+            db = get_db()
+            db.execute("SELECT 1")
+            db.execute("SELECT name FROM items")
+
+        assert len(slow_log.snapshot()) == 1
+        assert slow_log.dropped == 1
+
+    def test_endpoint(self, app, auth_client, slow_log):
+        """Test that the ops endpoint lists the slowest statements first."""
+        app.config["OPS_TOKEN"] = "s3cret"
+        auth_client.get("/shop/items")
+
+        response = auth_client.get("/ops/slow-queries", headers=OPS_HEADERS)
+        report = response.get_json()
+
+        assert response.status_code == 200
+        assert report["threshold_ms"] == 0
+        totals = [entry["total_ms"] for entry in report["queries"]]
+        assert totals and totals == sorted(totals, reverse=True)
+
+    def test_disabled_without_threshold(self, tmp_path):
+        """Test that a threshold of None turns the log off."""
+        app = create_app({
+            "TESTING": True,
+            "DATABASE": str(tmp_path / "shop.db"),
+            "SLOW_QUERY_THRESHOLD_MS": None,
+        })
+
+        assert get_slow_query_log(app) is None
+        with app.app_context():
+            assert get_db().slow_query_log is None
+            get_pool(app).close_idle()
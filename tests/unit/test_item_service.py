@@ -1,7 +1,13 @@
+import json
 import pytest
+from app import create_app
+from app.db import get_pool
+from app.services.hashing_service import get_hashing_pool
 from app.services.item_service import (
     get_all_items, get_item_by_id, search_items,
-    add_item, update_item, delete_item
+    add_item, update_item, delete_item,
+    get_items_page, decode_cursor, get_item_cache_stats,
+    iter_items, iter_search_items, get_catalog_version
 )
 
 # Mark all tests in this file as unit tests
@@ -174,3 +180,228 @@ class TestItemService:
             
             # Verify it's gone
             assert deleted_item is None
+
+    def test_search_matches_word_prefixes(self, app, test_items):
+        """Test that search matches the beginning of words in the name."""
+        with app.app_context():
+            results = search_items("lap")
+
+            assert [item['name'] for item in results] == ['Laptop']
+
+    def test_search_ranks_name_matches_first(self, app, test_items):
+        """Test that name matches rank above description-only matches."""
+        with app.app_context():
+            add_item('Charger', 'Fast charger for any laptop', 19.99)
+            add_item('Laptop Bag', 'Padded bag', 39.99)
+
+            names = [item['name'] for item in search_items("laptop")]
+
+            assert set(names) == {'Laptop', 'Laptop Bag', 'Charger'}
+            assert names[-1] == 'Charger'
+
+    def test_search_index_follows_updates_and_deletes(self, app, test_items):
+        """Test that the search index stays in sync with item changes."""
+        with app.app_context():
+            item = test_items[0]
+            update_item(item['id'], 'Notebook', item['description'], item['price'])
+
+            assert any(r['id'] == item['id'] for r in search_items("notebook"))
+
+            delete_item(item['id'])
+
+            assert search_items("notebook") == []
+
+    def test_search_without_words(self, app, test_items):
+        """Test that input without searchable words does not fail."""
+        with app.app_context():
+            assert search_items("!!") == []
+
+    def test_search_wildcards_matched_literally(self, app, test_items):
+        """Test that % and _ in punctuation-only input are not LIKE wildcards."""
+        with app.app_context():
+            add_item('50% Off Voucher', 'Half price', 5.0)
+
+            assert [item['name'] for item in search_items("%")] == ['50% Off Voucher']
+            assert search_items("_") == []
+
+    def test_get_all_items_with_limit_and_offset(self, app, test_items):
+        """Test retrieving a slice of the item listing."""
+        with app.app_context():
+            all_items = get_all_items()
+
+            page = get_all_items(limit=2, offset=1)
+
+            assert [item['id'] for item in page] == [item['id'] for item in all_items[1:3]]
+
+    def test_get_items_page_walks_whole_catalog(self, app, test_items):
+        """Test that following next cursors visits every item exactly once."""
+        with app.app_context():
+            # Same name as an existing item to exercise the id tie-breaker
+            add_item(test_items[0]['name'], 'Second item with this name', 5.0)
+            expected = [item['id'] for item in get_all_items()]
+
+            seen = []
+            cursor = None
+            while True:
+                page = get_items_page(2, cursor)
+                assert len(page['items']) <= 2
+                seen.extend(item['id'] for item in page['items'])
+                cursor = page['next_cursor']
+                if cursor is None:
+                    break
+
+            assert seen == expected
+
+    def test_invalid_cursor(self, app):
+        """Test that a malformed cursor is rejected."""
+        with app.app_context():
+            with pytest.raises(ValueError):
+                decode_cursor('not-a-cursor')
+            with pytest.raises(ValueError):
+                get_items_page(10, 'bm90LWpzb24=')
+
+    def test_catalog_reads_are_cached(self, app, test_items):
+        """Test that repeated reads are served from the item cache."""
+        with app.app_context():
+            first = get_item_by_id(test_items[0]['id'])
+            hits_before = get_item_cache_stats()['hits']
+
+            second = get_item_by_id(test_items[0]['id'])
+
+            assert second is first
+            assert get_item_cache_stats()['hits'] == hits_before + 1
+
+    def test_cache_invalidated_by_writes(self, app, test_items):
+        """Test that add, update and delete invalidate cached reads."""
+        with app.app_context():
+            item = test_items[0]
+            count = len(get_all_items())
+
+            add_item('Cached Lamp', 'Desk lamp', 20.0)
+            assert len(get_all_items()) == count + 1
+
+            get_item_by_id(item['id'])
+            update_item(item['id'], 'Renamed', item['description'], item['price'])
+            assert get_item_by_id(item['id'])['name'] == 'Renamed'
+
+            delete_item(item['id'])
+            assert get_item_by_id(item['id']) is None
+
+    def test_iter_items_matches_full_listing(self, app, test_items):
+        """Test that streaming iteration yields the catalog in listing order."""
+        with app.app_context():
+            expected = [item['id'] for item in get_all_items()]
+
+            assert [item['id'] for item in iter_items(chunk_size=2)] == expected
+
+    def test_iter_search_items_matches_search(self, app, test_items):
+        """Test that streamed search results match the ranked search."""
+        with app.app_context():
+            expected = [item['id'] for item in search_items('test')]
+
+            assert [item['id'] for item in iter_search_items('test', chunk_size=1)] == expected
+
+    def test_api_items_streams_ndjson(self, auth_client, app, test_items):
+        """Test that ?format=ndjson returns one item per line."""
+        with app.app_context():
+            expected = [item['id'] for item in get_all_items()]
+
+        response = auth_client.get('/shop/api/items?format=ndjson')
+
+        assert response.status_code == 200
+        assert response.is_streamed
+        assert response.mimetype == 'application/x-ndjson'
+        lines = response.get_data(as_text=True).splitlines()
+        assert [json.loads(line)['id'] for line in lines] == expected
+
+    def test_api_search_streams_json(self, auth_client, app, test_items):
+        """Test that ?stream=1 returns a single valid JSON document."""
+        with app.app_context():
+            expected = [item['id'] for item in search_items('test')]
+
+        response = auth_client.get('/shop/api/search?query=test&stream=1')
+
+        assert response.status_code == 200
+        assert response.is_streamed
+        data = json.loads(response.get_data(as_text=True))
+        assert data['query'] == 'test'
+        assert [item['id'] for item in data['items']] == expected
+
+    def test_catalog_version_bumped_by_writes(self, app, test_items):
+        """Test that item writes change the catalog ETag."""
+        with app.app_context():
+            etag, _ = get_catalog_version()
+
+            update_item(test_items[0]['id'], 'Renamed', 'Description', 1.0)
+
+            assert get_catalog_version()[0] != etag
+
+    def test_api_items_conditional_get(self, auth_client, app, test_items):
+        """Test that a matching If-None-Match gets a 304 without querying."""
+        response = auth_client.get('/shop/api/items')
+        etag = response.headers['ETag']
+        assert response.status_code == 200
+        assert response.headers['Last-Modified']
+
+        with app.app_context():
+            misses = get_item_cache_stats()['misses']
+
+        response = auth_client.get('/shop/api/items', headers={'If-None-Match': etag})
+
+        assert response.status_code == 304
+        assert response.headers['ETag'] == etag
+        assert response.get_data() == b''
+        with app.app_context():
+            assert get_item_cache_stats()['misses'] == misses
+
+    def test_api_item_etag_changes_after_update(self, auth_client, app, test_items):
+        """Test that a stale ETag gets the updated item."""
+        url = f"/shop/api/items/{test_items[0]['id']}"
+        etag = auth_client.get(url).headers['ETag']
+
+        with app.app_context():
+            update_item(test_items[0]['id'], 'Renamed', 'Description', 1.0)
+
+        response = auth_client.get(url, headers={'If-None-Match': etag})
+
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+        assert response.get_json()['item']['name'] == 'Renamed'
+
+    def test_cached_item_read_runs_one_query(self, auth_client, test_items):
+        """Test that a warm-cache request only looks the catalog version up once."""
+        url = f"/shop/api/items/{test_items[0]['id']}"
+        auth_client.get(url)
+
+        response = auth_client.get(url)
+
+        assert response.status_code == 200
+        assert 'desc="1 queries"' in response.headers['Server-Timing']
+
+    def test_write_from_other_process_changes_etag(self, auth_client, app, test_items):
+        """Test that a write through a second app on the same database changes the tag."""
+        url = f"/shop/api/items/{test_items[0]['id']}"
+        etag = auth_client.get(url).headers['ETag']
+
+        other = create_app({'TESTING': True, 'DATABASE': app.config['DATABASE']})
+        try:
+            with other.app_context():
+                item = test_items[0]
+                update_item(item['id'], item['name'], item['description'], 99.0)
+        finally:
+            if get_hashing_pool(other) is not None:
+                get_hashing_pool(other).shutdown()
+            get_pool(other).close_idle()
+
+        response = auth_client.get(url, headers={'If-None-Match': etag})
+
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+        assert response.get_json()['item']['price'] == 99.0
+
+    def test_api_item_not_found_is_not_tagged(self, auth_client):
+        """Test that error responses carry no ETag."""
+        response = auth_client.get('/shop/api/items/99999')
+
+        assert response.status_code == 404
+        assert 'ETag' not in response.headers
@@ -0,0 +1,88 @@
+import threading
+import pytest
+from app.services.metrics import MetricsRegistry
+
+# Mark all tests in this file as unit tests
+pytestmark = pytest.mark.unit
+
+
+class TestMetricsRegistry:
+    """Unit tests for the in-process metrics registry."""
+
+    def test_counters_summed_across_threads(self):
+        """Test that per-thread shards, including exited threads, are summed."""
+        registry = MetricsRegistry()
+        labels = (("endpoint", "shop.items"),)
+
+        def work():
+            for _ in range(1000):
+                registry.inc("requests_total", labels)
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        registry.inc("requests_total", labels)
+
+        counters, _ = registry.collect()
+        assert counters[("requests_total", labels)] == 4001
+
+    def test_histogram_buckets(self):
+        """Test that observations land in the first bucket that holds them."""
+        registry = MetricsRegistry(buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            registry.observe("latency_seconds", value)
+
+        _, histograms = registry.collect()
+        counts = histograms[("latency_seconds", ())]
+        assert counts[:3] == [2, 1, 1]
+        assert counts[-1] == pytest.approx(3.65)
+
+    def test_render_exposition_format(self):
+        """Test the Prometheus text output of counters, histograms and gauges."""
+        registry = MetricsRegistry(buckets=(0.1, 1.0))
+        registry.describe("latency_seconds", "histogram", "Request latency.")
+        registry.inc("requests_total", (("path", 'a"b'),), 2)
+        registry.observe("latency_seconds", 0.5)
+
+        text = registry.render([("pool_size", (), 5)])
+
+        assert "# HELP latency_seconds Request latency." in text
+        assert "# TYPE latency_seconds histogram" in text
+        assert 'latency_seconds_bucket{le="0.1"} 0' in text
+        assert 'latency_seconds_bucket{le="1.0"} 1' in text
+        assert 'latency_seconds_bucket{le="+Inf"} 1' in text
+        assert "latency_seconds_count 1" in text
+        assert 'requests_total{path="a\\"b"} 2' in text
+        assert "pool_size 5" in text
+
+
+class TestMetricsEndpoint:
+    """Unit tests for the /ops/metrics endpoint."""
+
+    def test_requests_recorded_per_endpoint(self, auth_client, test_items):
+        """Test that request counts and latencies are exposed per endpoint."""
+        auth_client.get("/shop/api/search?query=laptop")
+
+        text = auth_client.get("/ops/metrics").get_data(as_text=True)
+
+        assert (
+            'shop_http_requests_total{blueprint="shop",endpoint="shop.api_search",'
+            'method="GET",status="200"} 1'
+        ) in text
+        assert (
+            'shop_http_request_duration_seconds_count{blueprint="shop",'
+            'endpoint="shop.api_search"} 1'
+        ) in text
+        assert 'shop_cache_hit_ratio{cache="items"}' in text
+        assert 'shop_db_pool_connections{state="open"}' in text
+
+    def test_metrics_token(self, app, client):
+        """Test that a configured token is required from the scraper."""
+        app.config["METRICS_TOKEN"] = "s3cret"
+
+        assert client.get("/ops/metrics").status_code == 401
+        response = client.get("/ops/metrics", headers={"Authorization": "Bearer s3cret"})
+        assert response.status_code == 200
+        assert response.mimetype == "text/plain"
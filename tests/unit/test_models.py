@@ -0,0 +1,83 @@
+import json
+import pytest
+from app.db import get_db
+from app.models import BasketLine, Item, User, execute
+from app.services.basket_service import add_to_basket, get_basket_snapshot
+from app.services.item_service import get_item_by_id
+from app.services.user_service import get_user_by_id
+
+# Mark all tests in this file as unit tests
+pytestmark = pytest.mark.unit
+
+
+class TestModels:
+    """Unit tests for the slotted result rows."""
+
+    def test_row_factory_builds_model(self, app, test_items):
+        """Test that query rows are built as model instances."""
+        with app.app_context():
+            item = execute(
+                get_db(), Item, "SELECT * FROM items WHERE id = ?", (test_items[0]["id"],)
+            ).fetchone()
+
+            assert isinstance(item, Item)
+            assert item.name == test_items[0]["name"]
+            assert item["price"] == test_items[0]["price"]
+            assert dict(item) == test_items[0]
+            assert not hasattr(item, "__dict__")
+
+    def test_row_factory_built_once_per_column_list(self, app, test_items):
+        """Test that queries with the same columns share one specialized factory."""
+        with app.app_context():
+            db = get_db()
+            first = execute(db, Item, "SELECT id, name FROM items")
+            second = execute(db, Item, "SELECT id, name FROM items WHERE id = ?", (test_items[0]["id"],))
+
+            assert first.row_factory is second.row_factory
+            assert second.fetchone() == {"id": test_items[0]["id"], "name": test_items[0]["name"]}
+
+    def test_connection_rows_unchanged(self, app, test_items):
+        """Test that the model factory only applies to its own cursor."""
+        with app.app_context():
+            db = get_db()
+            execute(db, Item, "SELECT * FROM items").fetchall()
+
+            row = db.execute("SELECT * FROM items").fetchone()
+            assert not isinstance(row, Item)
+
+    def test_mapping_protocol(self):
+        """Test dict-style access on partially loaded rows."""
+        user = User(id=1, email="a@example.com")
+
+        assert user.keys() == ["id", "email"]
+        assert "email" in user
+        assert "password" not in user
+        assert user.get("password") is None
+        with pytest.raises(KeyError):
+            user["password"]
+        with pytest.raises(KeyError):
+            user["unknown"] = 1
+
+    def test_services_return_models(self, app, test_user, test_items):
+        """Test that the services hand out typed rows."""
+        with app.app_context():
+            add_to_basket(test_user["id"], test_items[0]["id"], 2)
+
+            user = get_user_by_id(test_user["id"])
+            line = get_basket_snapshot(test_user["id"])["basket_items"][0]
+
+            assert isinstance(get_item_by_id(test_items[0]["id"]), Item)
+            assert isinstance(user, User)
+            assert "password" not in user
+            assert isinstance(line, BasketLine)
+            assert line.subtotal == line.price * 2
+
+    def test_json_serialization(self, app, test_items):
+        """Test that the app's JSON provider serializes model rows."""
+        with app.app_context():
+            item = get_item_by_id(test_items[0]["id"])
+
+            data = json.loads(app.json.dumps({"item": item}))
+
+            assert data["item"]["id"] == item.id
+            assert data["item"]["name"] == item.name
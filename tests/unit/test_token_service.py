@@ -1,7 +1,7 @@
 import pytest
 import time
 import jwt
-from app.services.token_service import generate_token, decode_token
+from app.services.token_service import generate_token, decode_token, get_token_cache_stats
 
 # Mark all tests in this file as unit tests
 pytestmark = pytest.mark.unit
@@ -82,3 +82,43 @@ class TestTokenService:
             # Verify failure due to expiration
             assert result["success"] is False
             assert "expired" in result["message"].lower()
+
+    def test_repeated_decode_uses_cache(self, app):
+        """Test that decoding the same token again is served from the cache."""
+        with app.app_context():
+            token = generate_token(321)
+            decode_token(token)
+            hits_before = get_token_cache_stats()["hits"]
+
+            result = decode_token(token)
+
+            assert result == {"success": True, "user_id": "321"}
+            assert get_token_cache_stats()["hits"] == hits_before + 1
+
+    def test_cached_token_rejected_after_expiry(self, app, monkeypatch):
+        """Test that a cached token is still rejected once it expires."""
+        with app.app_context():
+            secret_key = app.config.get("SECRET_KEY", "dev")
+            now = time.time()
+            token = jwt.encode(
+                {"sub": "42", "iat": int(now), "exp": int(now) + 60},
+                secret_key,
+                algorithm="HS256",
+            )
+            assert decode_token(token)["success"] is True
+
+            monkeypatch.setattr(time, "time", lambda: now + 120)
+            result = decode_token(token)
+
+            assert result["success"] is False
+            assert "expired" in result["message"].lower()
+
+    def test_invalid_tokens_are_not_cached(self, app):
+        """Test that failed decodes are not remembered."""
+        with app.app_context():
+            decode_token("invalid.token.string")
+            decode_token("invalid.token.string")
+
+            stats = get_token_cache_stats()
+            assert stats["hits"] == 0
+            assert stats["size"] == 0
@@ -9,7 +9,10 @@ from app.services.user_service import (
     get_user_by_id,
     hash_password,
     verify_password,
+    parse_password_hash,
+    password_needs_rehash,
 )
+from app.db import get_db
 
 # Mark all tests in this file as unit tests
 pytestmark = pytest.mark.unit
@@ -134,15 +137,15 @@ class TestUserService:
         # Hash with auto-generated salt
         hashed1 = hash_password(password)
 
-        # Verify hash format (should contain salt and hash separated by $)
+        # Verify hash format (algorithm, iterations, salt and hash separated by $)
         assert "$" in hashed1
 
         # Hash with specific salt
         salt = "abcdef1234567890"
         hashed2 = hash_password(password, salt)
 
-        # Verify hash starts with the salt
-        assert hashed2.startswith(salt + "$")
+        # Verify the hash records algorithm, iterations and salt
+        assert hashed2.startswith(f"pbkdf2_sha256$100000${salt}$")
 
         # Hash the same password twice, should get different results with auto salt
         hashed3 = hash_password(password)
@@ -159,6 +162,41 @@ class TestUserService:
         # Verify incorrect password
         assert verify_password(hashed, "wrongpassword") is False
 
+    def test_verify_legacy_password_hash(self):
+        """Test that hashes in the old salt$hash format still verify."""
+        salt = "abcdef1234567890"
+        pwdhash = hash_password("testpassword123", salt).split("$")[-1]
+        legacy = f"{salt}${pwdhash}"
+
+        assert parse_password_hash(legacy) == ("pbkdf2_sha256", 100000, salt, pwdhash)
+        assert verify_password(legacy, "testpassword123") is True
+        assert verify_password(legacy, "wrongpassword") is False
+        assert password_needs_rehash(legacy) is True
+
+    def test_verify_malformed_password_hash(self):
+        """Test that an unreadable stored hash never verifies."""
+        assert verify_password("not-a-hash", "anything") is False
+        assert verify_password("md5$1$salt$hash", "anything") is False
+
+    def test_password_rehashed_on_login(self, app, test_user):
+        """Test that login upgrades hashes made with other parameters."""
+        with app.app_context():
+            db = get_db()
+            old_hash = hash_password(test_user["password"], iterations=1000)
+            db.execute(
+                "UPDATE users SET password = ? WHERE id = ?", (old_hash, test_user["id"])
+            )
+            db.commit()
+
+            result = authenticate_user(test_user["email"], test_user["password"])
+
+            assert result["success"] is True
+            stored = db.execute(
+                "SELECT password FROM users WHERE id = ?", (test_user["id"],)
+            ).fetchone()["password"]
+            assert parse_password_hash(stored)[1] == app.config["PASSWORD_HASH_ITERATIONS"]
+            assert password_needs_rehash(stored) is False
+
     def test_register_user(self, app, get_random_string):
         """Test user registration with valid data."""
         with app.app_context():